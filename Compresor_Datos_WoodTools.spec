@@ -5,7 +5,7 @@ a = Analysis(
     ['interfaz_cleanser.py'],
     pathex=[],
     binaries=[],
-    datas=[('Imagenes', 'Imagenes')],
+    datas=[('Imagenes', 'Imagenes'), ('reglas_vendedores.json', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
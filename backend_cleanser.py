@@ -1,10 +1,41 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 import re
 import sqlite3
 import json
+import time
+import hashlib
+import io
+import threading
+import multiprocessing
+import weakref
+import bisect
+import atexit
+import shutil
+import tempfile
+import unicodedata
+from collections import namedtuple, deque, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from itertools import islice
+from types import MappingProxyType
 from datetime import datetime
+from functools import lru_cache
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None # Sin pyarrow: textos en dtype object y sin caché en disco
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Los textos crudos (Row_String) van en un único buffer Arrow en vez de un objeto str por fila
+DTYPE_TEXTO = pd.ArrowDtype(pa.large_string()) if pa is not None else object
 
 # ==========================================
 # BASE DE DATOS PARA HISTORIAL
@@ -23,6 +54,21 @@ def inicializar_db():
             registros_encontrados INTEGER
         )
     ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS metricas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            historial_id INTEGER,
+            fecha TEXT,
+            etapa TEXT,
+            archivo TEXT,
+            segundos REAL,
+            filas INTEGER,
+            archivos INTEGER,
+            filas_por_segundo REAL,
+            archivos_por_segundo REAL,
+            pico_rss_mb REAL
+        )
+    ''')
     conn.commit()
     conn.close()
 
@@ -32,8 +78,10 @@ def registrar_historial(tipo_carga, ruta, registros):
     fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     cursor.execute('INSERT INTO historial (fecha, tipo_carga, ruta, registros_encontrados) VALUES (?, ?, ?, ?)', 
                    (fecha, tipo_carga, ruta, registros))
+    historial_id = cursor.lastrowid
     conn.commit()
     conn.close()
+    return historial_id
 
 def obtener_historial():
     conn = sqlite3.connect(DB_NAME)
@@ -41,73 +89,196 @@ def obtener_historial():
     conn.close()
     return df
 
+# ==========================================
+# MÉTRICAS DE RENDIMIENTO
+# ==========================================
+# Una métrica por etapa (lectura, agrupación, enriquecimiento...) y una por archivo leído.
+# Las funciones del motor reciben metricas_callback (igual que progress_callback) y le pasan cada Metrica.
+# pico_rss_mb es lo que la memoria residente llegó a subir durante esa etapa o archivo, sobre la que
+# tenía el proceso al empezar: no el máximo histórico del proceso, que nunca baja.
+Metrica = namedtuple('Metrica', ['etapa', 'archivo', 'segundos', 'filas', 'archivos', 'pico_rss_mb'])
+
+INTERVALO_MUESTREO_RSS = 0.05 # Segundos entre muestras de memoria mientras hay alguna etapa midiéndose
+
+def rss_actual_mb():
+    """Memoria residente actual del proceso en MB, o None si no hay cómo medirla."""
+    if psutil is not None:
+        return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+    try:
+        with open('/proc/self/statm') as f: # Linux sin psutil
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+class Medicion:
+    """Inicio de una etapa: se crea al empezar (iniciar_medicion) y se cierra con medir_desde."""
+    __slots__ = ('inicio', 'rss_inicio', 'rss_pico', '__weakref__')
+    
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.rss_inicio = self.rss_pico = rss_actual_mb()
+    
+    def anotar(self, rss):
+        if rss is not None and rss > self.rss_pico: self.rss_pico = rss
+
+# Un solo hilo muestrea la memoria para todas las mediciones abiertas del proceso. Una medición se
+# cierra sola cuando se libera (al salir de la función que la creó, aunque sea por una excepción)
+# y el hilo termina cuando no queda ninguna.
+_mediciones_abiertas = weakref.WeakSet()
+_candado_muestreo = threading.Lock()
+_hilo_muestreo = None
+
+def _muestrear_rss():
+    global _hilo_muestreo
+    while True:
+        time.sleep(INTERVALO_MUESTREO_RSS)
+        with _candado_muestreo:
+            abiertas = list(_mediciones_abiertas)
+            if not abiertas:
+                _hilo_muestreo = None
+                return
+        rss = rss_actual_mb()
+        for medicion in abiertas: medicion.anotar(rss)
+        abiertas = medicion = None # Sin referencias propias: si no, la medición nunca se libera
+
+def _reiniciar_muestreo():
+    # En un hijo de fork el hilo no existe y el candado pudo quedar tomado
+    global _candado_muestreo, _hilo_muestreo, _mediciones_abiertas
+    _candado_muestreo, _hilo_muestreo, _mediciones_abiertas = threading.Lock(), None, weakref.WeakSet()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_muestreo)
+
+def iniciar_medicion():
+    global _hilo_muestreo
+    medicion = Medicion()
+    if medicion.rss_inicio is None: return medicion
+    with _candado_muestreo:
+        _mediciones_abiertas.add(medicion)
+        if _hilo_muestreo is None:
+            _hilo_muestreo = threading.Thread(target=_muestrear_rss, daemon=True)
+            _hilo_muestreo.start()
+    return medicion
+
+def medir_desde(inicio, etapa, filas=0, archivos=0, archivo=None):
+    """Arma la Metrica de una etapa que arrancó en inicio (iniciar_medicion())."""
+    inicio.anotar(rss_actual_mb())
+    pico = inicio.rss_pico - inicio.rss_inicio if inicio.rss_inicio is not None else None
+    return Metrica(etapa, archivo, time.perf_counter() - inicio.inicio, filas, archivos, pico)
+
+def registrar_metricas(metricas, historial_id=None):
+    if not metricas: return
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    filas_db = [(historial_id, fecha, m.etapa, m.archivo, m.segundos, m.filas, m.archivos,
+                 m.filas / m.segundos if m.segundos > 0 else None,
+                 m.archivos / m.segundos if m.segundos > 0 else None, m.pico_rss_mb) for m in metricas]
+    conn = sqlite3.connect(DB_NAME)
+    conn.executemany('''INSERT INTO metricas (historial_id, fecha, etapa, archivo, segundos, filas, archivos,
+                        filas_por_segundo, archivos_por_segundo, pico_rss_mb) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', filas_db)
+    conn.commit()
+    conn.close()
+
+def obtener_metricas(limite=500):
+    conn = sqlite3.connect(DB_NAME)
+    df = pd.read_sql_query('SELECT * FROM metricas ORDER BY id DESC LIMIT ?', conn, params=(limite,))
+    conn.close()
+    return df
+
 # ==========================================
 # CONFIGURACIÓN DE CELULARES Y VÍNCULOS ZONA-VENDEDOR
 # ==========================================
 ARCHIVO_VEND = "vendedores_config.json"
 ARCHIVO_VINCULOS = "vinculos_zonas.json"
 
-def cargar_mapa_vendedores():
-    defaults = {
-        "0": "1145394279 o 1165630406", 
-        "1": "1157528428",
-        "01": "1157528428",
-        "302": "1157528428",
-        "40": "1157528427",
-        "15": "1157528427",
-        "18": "1145640940",
-        "16": "1145640831",
-        "44": "1156321012",
-        "4": "1156321012",
-        "04": "1156321012",
-        "9": "1153455274",
-        "09": "1153455274",
-        "3": "1168457778",
-        "03": "1168457778",
-        "5": "1164591316",
-        "05": "1164591316"
-    }
-    if not os.path.exists(ARCHIVO_VEND):
-        try:
-            with open(ARCHIVO_VEND, 'w', encoding='utf-8') as f:
-                json.dump(defaults, f, indent=4)
-        except: pass
-        return defaults
-    else:
+DEFAULTS_VENDEDORES = {
+    "0": "1145394279 o 1165630406", 
+    "1": "1157528428",
+    "01": "1157528428",
+    "302": "1157528428",
+    "40": "1157528427",
+    "15": "1157528427",
+    "18": "1145640940",
+    "16": "1145640831",
+    "44": "1156321012",
+    "4": "1156321012",
+    "04": "1156321012",
+    "9": "1153455274",
+    "09": "1153455274",
+    "3": "1168457778",
+    "03": "1168457778",
+    "5": "1164591316",
+    "05": "1164591316"
+}
+DEFAULTS_VINCULOS = {"137": "03"} # Ejemplo de fábrica
+
+# Caché en memoria: ruta absoluta -> (sello del archivo, datos). El sello es (mtime_ns, tamaño),
+# así sólo se vuelve a leer el JSON cuando alguien lo modificó en disco.
+_CACHE_CONFIG = {}
+_LOCK_CONFIG = threading.Lock()
+
+# Foto inmutable de la configuración para usar durante todo un cruce
+SnapshotConfig = namedtuple('SnapshotConfig', ['vinculos', 'vendedores', 'version'])
+
+def _sello_archivo(ruta):
+    try:
+        st = os.stat(ruta)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def _cargar_json_cacheado(ruta, defaults):
+    clave = os.path.abspath(ruta)
+    with _LOCK_CONFIG:
+        sello = _sello_archivo(ruta)
+        entrada = _CACHE_CONFIG.get(clave)
+        if entrada is not None and sello is not None and entrada[0] == sello:
+            return entrada[1]
+        
+        if sello is None:
+            datos = dict(defaults)
+            try:
+                with open(ruta, 'w', encoding='utf-8') as f:
+                    json.dump(defaults, f, indent=4)
+            except: pass
+        else:
+            try:
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    datos = json.load(f)
+            except:
+                datos = dict(defaults)
+        _CACHE_CONFIG[clave] = (_sello_archivo(ruta), datos)
+        return datos
+
+def _guardar_json_cacheado(ruta, nuevo_mapa):
+    clave = os.path.abspath(ruta)
+    with _LOCK_CONFIG:
         try:
-            with open(ARCHIVO_VEND, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(ruta, 'w', encoding='utf-8') as f:
+                json.dump(nuevo_mapa, f, indent=4)
         except:
-            return defaults
+            _CACHE_CONFIG.pop(clave, None)
+            return False
+        _CACHE_CONFIG[clave] = (_sello_archivo(ruta), dict(nuevo_mapa))
+        return True
+
+def cargar_mapa_vendedores():
+    return dict(_cargar_json_cacheado(ARCHIVO_VEND, DEFAULTS_VENDEDORES))
 
 def guardar_mapa_vendedores(nuevo_mapa):
-    try:
-        with open(ARCHIVO_VEND, 'w', encoding='utf-8') as f:
-            json.dump(nuevo_mapa, f, indent=4)
-        return True
-    except:
-        return False
+    return _guardar_json_cacheado(ARCHIVO_VEND, nuevo_mapa)
 
 def cargar_vinculos_zonas():
-    defaults = {"137": "03"} # Ejemplo de fábrica
-    if not os.path.exists(ARCHIVO_VINCULOS):
-        try:
-            with open(ARCHIVO_VINCULOS, 'w', encoding='utf-8') as f:
-                json.dump(defaults, f, indent=4)
-        except: pass
-        return defaults
-    else:
-        try:
-            with open(ARCHIVO_VINCULOS, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except: return defaults
+    return dict(_cargar_json_cacheado(ARCHIVO_VINCULOS, DEFAULTS_VINCULOS))
 
 def guardar_vinculos_zonas(nuevo_mapa):
-    try:
-        with open(ARCHIVO_VINCULOS, 'w', encoding='utf-8') as f:
-            json.dump(nuevo_mapa, f, indent=4)
-        return True
-    except: return False
+    return _guardar_json_cacheado(ARCHIVO_VINCULOS, nuevo_mapa)
+
+def obtener_snapshot_config():
+    """Devuelve vínculos y celulares de solo lectura; el cruce usa esta misma foto de principio a fin."""
+    vinculos = _cargar_json_cacheado(ARCHIVO_VINCULOS, DEFAULTS_VINCULOS)
+    vendedores = _cargar_json_cacheado(ARCHIVO_VEND, DEFAULTS_VENDEDORES)
+    version = (_sello_archivo(ARCHIVO_VINCULOS), _sello_archivo(ARCHIVO_VEND))
+    return SnapshotConfig(MappingProxyType(dict(vinculos)), MappingProxyType(dict(vendedores)), version)
 
 # ==========================================
 # DICCIONARIO DE ZONAS
@@ -143,7 +314,68 @@ MAPA_ZONAS = {
     '301': 'EXTERIOR'
 }
 
+# Palabras clave de MAPA_ZONAS precompiladas una sola vez: una regex para los códigos numéricos y una
+# alternancia única para las descripciones, ordenada por prioridad. Una coincidencia puede tapar a otra
+# clave que empiece adentro suyo (ej: "ZONA SUR" tapa "SUR II" en "ZONA SUR II"); para esos casos cada
+# clave trae la lista precalculada de claves que podría tapar y se confirman con un 'in' directo.
+MatcherZonas = namedtuple('MatcherZonas', ['patron_codigos', 'codigos', 'patron_claves', 'prioridad_claves', 'solapables'])
+CLAVES_ZONA_GENERICAS = ["ZONA", "RUTA", "ZONA SUR", "ZONA NORTE"]
+RESPALDOS_ZONA = [("ZONA SUR", "102 o 104 | ZONA SUR"), ("ZONA NORTE", "101 | ZONA NORTE")]
+
+@lru_cache(maxsize=1)
+def compilar_matcher_zonas():
+    codigos = {num: f"{num} | {desc}" for num, desc in MAPA_ZONAS.items()}
+    prioridad_claves = {}
+    for num, desc in MAPA_ZONAS.items():
+        clave = desc.split('(')[0].strip().upper()
+        if clave not in CLAVES_ZONA_GENERICAS:
+            prioridad_claves.setdefault(clave, (len(prioridad_claves), f"{num} | {desc}"))
+    for clave, resultado in RESPALDOS_ZONA:
+        prioridad_claves.setdefault(clave, (len(prioridad_claves), resultado))
+    
+    solapables = {}
+    for clave in prioridad_claves:
+        colas = [clave[i:] for i in range(1, len(clave))]
+        solapables[clave] = tuple(otra for otra in prioridad_claves if any(otra.startswith(c) or c.startswith(otra) for c in colas))
+    
+    # Códigos de 3 dígitos aislados; el primer carácter literal deja que 're' saltee rápido el resto del texto
+    patron_codigos = re.compile(r'[13](?<=\b[13])\d\d\b')
+    patron_claves = re.compile('|'.join(re.escape(clave) for clave in prioridad_claves))
+    return MatcherZonas(patron_codigos, MappingProxyType(codigos), patron_claves, MappingProxyType(prioridad_claves), MappingProxyType(solapables))
+
+def _resolver_zona(texto, matcher):
+    # 1. El primer código numérico del catálogo que aparezca en el texto
+    for num in matcher.patron_codigos.findall(texto):
+        if num in matcher.codigos: return matcher.codigos[num]
+    
+    # 2. La descripción de mayor prioridad presente (ZONA SUR / ZONA NORTE van al final de la lista)
+    mejor = None
+    for clave in matcher.patron_claves.findall(texto):
+        prioridad = matcher.prioridad_claves[clave]
+        if mejor is None or prioridad < mejor: mejor = prioridad
+        for otra in matcher.solapables[clave]:
+            prioridad = matcher.prioridad_claves[otra]
+            if prioridad < mejor and otra in texto: mejor = prioridad
+    return mejor[1] if mejor else None
+
 def extraer_zona_inteligente(texto_fila, zona_cruda):
+    matcher = compilar_matcher_zonas()
+    texto = (str(texto_fila) + " | " + str(zona_cruda)).upper()
+    zona = _resolver_zona(texto, matcher)
+    if zona: return zona
+    
+    zc = str(zona_cruda).strip()
+    if zc and zc.lower() != 'nan': return zc
+    return "Desconocida"
+
+def buscar_zonas_serie(textos):
+    """Pasa el matcher de zonas sobre una Series de textos en mayúsculas; NaN donde no se reconoce ninguna zona."""
+    matcher = compilar_matcher_zonas()
+    zonas = [_resolver_zona(texto, matcher) for texto in textos.to_numpy(dtype=object)]
+    return pd.Series(zonas, index=textos.index, dtype=object)
+
+def extraer_zona_referencia(texto_fila, zona_cruda):
+    """Implementación original (regex + recorrido de MAPA_ZONAS por fila); queda como referencia."""
     texto = (str(texto_fila) + " | " + str(zona_cruda)).upper()
     matches = re.findall(r'\b(1[0-5]\d|301)\b', texto)
     for m in matches:
@@ -160,13 +392,87 @@ def extraer_zona_inteligente(texto_fila, zona_cruda):
     if zc and zc.lower() != 'nan': return zc
     return "Desconocida"
 
-def extraer_vendedor_inteligente(texto_crudo, vendedor_actual, zona_o_cobrador):
+# ==========================================
+# REGLAS DE ATRIBUCIÓN DE VENDEDORES
+# ==========================================
+ARCHIVO_REGLAS_VEND = "reglas_vendedores.json"
+
+# Reglas compiladas: una sola regex con todos los nombres + tablas de búsqueda directa
+ReglasVendedor = namedtuple('ReglasVendedor', ['patron_nombres', 'prioridad_nombres', 'alias_codigos'])
+
+def _ruta_recurso(relative_path):
+    """Ubica archivos que viajan con el programa (también adentro del .exe de PyInstaller)"""
+    base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_path, relative_path)
+
+@lru_cache(maxsize=1)
+def cargar_reglas_vendedor():
+    with open(_ruta_recurso(ARCHIVO_REGLAS_VEND), 'r', encoding='utf-8') as f:
+        reglas = json.load(f)
+    
+    # Cada palabra recuerda su posición en la lista: la de menor posición gana, igual que el if-chain original
+    prioridad_nombres = {}
+    for prioridad, regla in enumerate(reglas['nombres']):
+        for palabra in regla['palabras']:
+            prioridad_nombres.setdefault(palabra.upper(), (prioridad, regla['codigo']))
+    palabras = sorted(prioridad_nombres, key=len, reverse=True)
+    patron_nombres = re.compile(r'\b(?:' + '|'.join(re.escape(p) for p in palabras) + r')\b')
+    
+    alias_codigos = {}
+    for regla in reglas['alias_codigos']:
+        for valor in regla['valores']:
+            alias_codigos.setdefault(valor.upper(), regla['codigo'])
+    return ReglasVendedor(patron_nombres, MappingProxyType(prioridad_nombres), MappingProxyType(alias_codigos))
+
+_RE_ZONA_NUMERICA = re.compile(r'\b(1[0-5]\d|301)\b')
+_RE_CODIGO_COMPUESTO = re.compile(r'\b(\d+/\d+)\b')
+_RE_SOLO_DIGITOS = re.compile(r'^[\d]+$')
+_RE_NUMERO = re.compile(r'\b(\d+)\b')
+
+def _atribuir_vendedor(texto_completo, v, z, vinculos, reglas):
+    # 0. MAPA DINÁMICO DE ZONAS (Si detecta una zona, la asocia al vendedor guardado en tu panel)
+    match_zona = _RE_ZONA_NUMERICA.search(texto_completo)
+    if match_zona:
+        vend_asignado = str(vinculos.get(match_zona.group(1), "")).strip()
+        if vend_asignado and vend_asignado != "0":
+            return vend_asignado
+    
+    # 1. Nombres literales: una pasada con la regex compilada, gana la regla de mayor prioridad
+    hallados = reglas.patron_nombres.findall(texto_completo)
+    if hallados: return min(reglas.prioridad_nombres[p] for p in hallados)[1]
+    
+    # 2. Análisis cruzado Vendedor / Cobrador-Zona por tabla de alias
+    if v in reglas.alias_codigos: return reglas.alias_codigos[v]
+    if z in reglas.alias_codigos: return reglas.alias_codigos[z]
+    
+    # 3. Código compuesto especial en el texto (Ej: "302/1", "40/15")
+    match_compuesto = _RE_CODIGO_COMPUESTO.search(texto_completo)
+    if match_compuesto:
+        return match_compuesto.group(1)
+    
+    # 4. Número incrustado en la columna Vendedor (ignorar el 0 por default)
+    if _RE_SOLO_DIGITOS.match(v) and v != "0":
+        return v
+    match_num = _RE_NUMERO.search(v)
+    if match_num and match_num.group(1) != "0":
+        return match_num.group(1)
+    return "0"
+
+def extraer_vendedor_inteligente(texto_crudo, vendedor_actual, zona_o_cobrador, vinculos=None):
+    if vinculos is None: vinculos = cargar_vinculos_zonas()
+    v = str(vendedor_actual).strip().upper()
+    z = str(zona_o_cobrador).strip().upper()
+    texto_completo = (str(texto_crudo) + " " + v + " " + z).upper()
+    return _atribuir_vendedor(texto_completo, v, z, vinculos, cargar_reglas_vendedor())
+
+def extraer_vendedor_referencia(texto_crudo, vendedor_actual, zona_o_cobrador, vinculos=None):
+    """Implementación original con las reglas escritas a mano; queda como referencia y para el benchmark."""
     v = str(vendedor_actual).strip().upper()
     z = str(zona_o_cobrador).strip().upper()
     texto_completo = (str(texto_crudo) + " " + v + " " + z).upper()
     
     # 0. MAPA DINÁMICO DE ZONAS (Si detecta una zona, la asocia al vendedor guardado en tu panel)
-    vinculos = cargar_vinculos_zonas()
+    if vinculos is None: vinculos = cargar_vinculos_zonas()
     match_zona = re.search(r'\b(1[0-5]\d|301)\b', texto_completo)
     if match_zona:
         num_zona = match_zona.group(1)
@@ -250,140 +556,1899 @@ def estandarizar_columnas(df):
     df = df.loc[:, ~df.columns.duplicated()].copy() 
     return df
 
-def procesar_un_archivo(ruta):
+FILAS_SONDA_ENCABEZADO = 25
+TAMANO_BLOQUE_CSV = 100000
+
+PALABRAS_ENCABEZADO = [
+    (10, ['nombre', 'cliente', 'razon social', 'razón social', 'clientes']),
+    (5, ['cód.', 'cod.', 'cod', 'código', 'codigo', 'id', 'nro', 'cód']),
+    (5, ['teléfonos', 'telefono', 'tel', 'cel', 'celular', 'movil', 'contacto']),
+    (3, ['vendedor', 'vend', 'zona', 'localidad', 'direc', 'domicilio', 'cobrador', 'cobr.']),
+]
+MARCAS_FILA_DESCARTABLE = ["-zzzz", "-999", "z.fiscal", "ordenado por"]
+
+def detectar_fila_encabezado(df_sonda):
+    """Puntúa las primeras filas (todas las celdas a la vez) y devuelve la etiqueta del encabezado, o -1 si ninguna alcanza."""
+    sonda = df_sonda.head(FILAS_SONDA_ENCABEZADO).fillna("").astype(str).astype(object)
+    if sonda.empty: return -1
+    celdas = sonda.apply(lambda col: col.str.lower().str.strip())
+    
+    score = pd.Series(0, index=sonda.index)
+    for puntos, palabras in PALABRAS_ENCABEZADO:
+        score += celdas.isin(palabras).sum(axis=1) * puntos
+    no_vacias = (celdas != "").sum(axis=1)
+    
+    texto_fila = sonda.agg(" ".join, axis=1).str.lower()
+    descartable = pd.Series(False, index=sonda.index)
+    for marca in MARCAS_FILA_DESCARTABLE:
+        descartable |= texto_fila.str.contains(marca, regex=False)
+    
+    final_score = score.where((no_vacias > 2) & ~descartable, 0)
+    # idxmax devuelve la primera fila con el puntaje máximo, igual que el recorrido original
+    return final_score.idxmax() if final_score.max() >= 10 else -1
+
+def _tiene_columna_nombre(nombres):
+    return 'Nombre' in estandarizar_columnas(pd.DataFrame(columns=nombres)).columns
+
+def _nombres_desde_encabezado(fila_encabezado, ancho):
+    return fila_encabezado.fillna(pd.Series([f"Col_{i}" for i in range(ancho)])).astype(str)
+
+def _armar_row_string(df_temp):
+    """
+    Une con ' | ' los valores no nulos de cada fila (lo mismo que row.dropna() + join),
+    pero recorriendo columnas en vez de filas.
+    """
+    columnas = [df_temp.iloc[:, i].to_numpy(dtype=object) for i in range(df_temp.shape[1])]
+    if pa is not None:
+        arrays = [pa.array(col, from_pandas=True) for col in columnas]
+        if all(pa.types.is_string(a.type) or pa.types.is_null(a.type) for a in arrays):
+            arrays = [a.cast(pa.large_string()) for a in arrays]
+            unidos = pc.binary_join_element_wise(*arrays, pa.scalar(' | ', pa.large_string()), null_handling='skip')
+            return pd.Series(unidos, index=df_temp.index, dtype=DTYPE_TEXTO)
+    
+    # Sin pyarrow (o con celdas que no son texto): concatenación de arrays object, columna por columna
+    textos = np.full(len(df_temp), '', dtype=object)
+    con_valor = np.zeros(len(df_temp), dtype=bool)
+    for col in columnas:
+        presentes = pd.notna(col)
+        if not presentes.any(): continue
+        separador = np.where(con_valor[presentes], ' | ', '').astype(object)
+        textos[presentes] = textos[presentes] + separador + col[presentes].astype(str).astype(object)
+        con_valor |= presentes
+    return pd.Series(textos, index=df_temp.index, dtype=object)
+
+def _preparar_bloque(df_temp, ultimo_cliente=np.nan):
+    """
+    Limpia un bloque de filas ya con sus encabezados y lo reduce a una fila por cliente.
+    ultimo_cliente arrastra el Numero_Cliente del bloque anterior para el relleno hacia adelante.
+    Devuelve (parcial, filas útiles, último cliente); los parciales se juntan con _combinar_parciales.
+    """
+    df_temp = df_temp.dropna(how='all') 
+    if df_temp.empty: return None, 0, ultimo_cliente
+    
+    df_temp = estandarizar_columnas(df_temp)
+    if 'Nombre' not in df_temp.columns: return None, 0, ultimo_cliente
+    
+    df_temp['Row_String'] = _armar_row_string(df_temp)
+    
+    for col in ['Nombre', 'Numero_Cliente', 'Zona_Cruda', 'Vendedor']:
+        if col not in df_temp.columns: df_temp[col] = ""
+    
+    numeros = df_temp['Numero_Cliente'].replace(r'^\s*$', np.nan, regex=True).ffill()
+    numeros = numeros.fillna(ultimo_cliente) if pd.notna(ultimo_cliente) else numeros
+    if pd.notna(numeros.iloc[-1]): ultimo_cliente = numeros.iloc[-1]
+    df_temp['Numero_Cliente'] = np.where(numeros.isna(), "SinID_" + df_temp.index.astype(str), numeros)
+    
+    for col in ['Nombre', 'Vendedor', 'Zona_Cruda']:
+        df_temp[col] = df_temp[col].replace([r'^\s*$', 'nan', 'None'], np.nan, regex=True)
+    
+    # Primera fila de cada cliente + primer valor no vacío de cada campo (lo mismo que ffill/bfill por grupo)
+    primeros_validos = df_temp.groupby('Numero_Cliente', sort=False)[['Nombre', 'Vendedor', 'Zona_Cruda']].first()
+    parcial = df_temp.drop_duplicates(subset=['Numero_Cliente']).copy()
+    for col in ['Nombre', 'Vendedor', 'Zona_Cruda']:
+        parcial[col] = parcial['Numero_Cliente'].map(primeros_validos[col])
+    # drop_duplicates y _unir_textos_por_grupo dejan los clientes en el mismo orden (primera aparición)
+    parcial['Row_String'] = _unir_textos_por_grupo(df_temp['Numero_Cliente'], df_temp['Row_String']).set_axis(parcial.index)
+    return parcial, len(df_temp), ultimo_cliente
+
+def _combinar_parciales(parciales):
+    # Un cliente puede quedar partido entre bloques: se queda con su primera fila, el primer valor
+    # no vacío de cada campo y los textos unidos en el orden de lectura.
+    if len(parciales) == 1:
+        df_agrupado = parciales[0]
+    else:
+        df_todos = pd.concat(parciales, ignore_index=True)
+        primeros_validos = df_todos.groupby('Numero_Cliente', sort=False)[['Nombre', 'Vendedor', 'Zona_Cruda']].first()
+        textos = _unir_textos_por_grupo(df_todos['Numero_Cliente'], df_todos['Row_String'])
+        df_agrupado = df_todos.drop_duplicates(subset=['Numero_Cliente']).copy()
+        for col in ['Nombre', 'Vendedor', 'Zona_Cruda']:
+            df_agrupado[col] = df_agrupado['Numero_Cliente'].map(primeros_validos[col])
+        df_agrupado['Row_String'] = textos.set_axis(df_agrupado.index)
+    
+    for col in ['Nombre', 'Vendedor', 'Zona_Cruda']:
+        df_agrupado[col] = df_agrupado[col].fillna("")
+    textos = df_agrupado.pop('Row_String')
+    df_agrupado['Row_String'] = textos
+    return df_agrupado.reset_index(drop=True)
+
+def _fuente(ruta, contenido=None):
+    # Si el archivo ya se leyó a memoria (ver precargar_archivos) se parsea desde ahí, sin reabrir la ruta
+    return io.BytesIO(contenido) if contenido is not None else ruta
+
+def _leer_csv_en_bloques(ruta, tamano_bloque=TAMANO_BLOQUE_CSV, contenido=None):
+    """
+    Lectura en streaming de un CSV: detecta el encabezado con las primeras filas y después
+    recorre el resto en bloques de tamano_bloque filas. La memoria pico depende del bloque
+    (más el resumen por cliente que se va acumulando), no del tamaño del archivo.
+    """
+    sonda = pd.read_csv(_fuente(ruta, contenido), dtype=str, header=None, nrows=FILAS_SONDA_ENCABEZADO)
+    if sonda.empty: return [], 0
+    header_idx = detectar_fila_encabezado(sonda)
+    if header_idx < 0: return [], 0 # Sin encabezado no hay columna 'Nombre' posible
+    nombres = _nombres_desde_encabezado(sonda.iloc[header_idx], len(sonda.columns))
+    if not _tiene_columna_nombre(nombres): return [], 0
+    
+    parciales = []
+    total_filas = 0
+    ultimo_cliente = np.nan
+    for bloque in pd.read_csv(_fuente(ruta, contenido), dtype=str, header=None, chunksize=tamano_bloque):
+        bloque = bloque[bloque.index > header_idx]
+        if bloque.empty: continue
+        bloque.index = bloque.index - (header_idx + 1) # Misma numeración que tras el reset_index de la lectura completa
+        bloque.columns = nombres
+        parcial, filas, ultimo_cliente = _preparar_bloque(bloque, ultimo_cliente)
+        if parcial is not None:
+            parciales.append(parcial)
+            total_filas += filas
+    if not parciales: return [], 0
+    return [_combinar_parciales(parciales)], total_filas
+
+def leer_y_agrupar_archivo(ruta, tamano_bloque=TAMANO_BLOQUE_CSV, contenido=None):
+    """
+    Parsea un Excel/CSV y devuelve (clientes agrupados, filas leídas). Los errores se propagan.
+    contenido son los bytes del archivo si ya están en memoria; la ruta solo define el formato.
+    """
+    if ruta.endswith('.csv'):
+        df_agrupado_total, total_filas = _leer_csv_en_bloques(ruta, tamano_bloque, contenido)
+        if not df_agrupado_total: return pd.DataFrame(), 0
+        return compactar_tipos(df_agrupado_total[0]), total_filas
+    
+    xls = pd.ExcelFile(_fuente(ruta, contenido))
+    df_agrupado_total = []
+    total_filas = 0
+    
+    for hoja in xls.sheet_names:
+        # Fase 1: sonda barata con las primeras filas; las hojas sin encabezado o sin 'Nombre' se descartan acá
+        sonda = pd.read_excel(xls, sheet_name=hoja, dtype=str, header=None, nrows=FILAS_SONDA_ENCABEZADO)
+        if sonda.empty: continue
+        header_idx = detectar_fila_encabezado(sonda)
+        if header_idx < 0: continue # Quedaría con columnas Col_i, que nunca traen 'Nombre'
+        if not _tiene_columna_nombre(_nombres_desde_encabezado(sonda.iloc[header_idx], len(sonda.columns))): continue
+        
+        # Fase 2: lectura principal arrancando debajo del encabezado
+        df_temp = pd.read_excel(xls, sheet_name=hoja, dtype=str, header=None, skiprows=header_idx + 1)
+        ancho = max(len(sonda.columns), len(df_temp.columns))
+        df_temp = df_temp.reindex(columns=range(ancho))
+        df_temp.columns = _nombres_desde_encabezado(sonda.iloc[header_idx].reindex(range(ancho)), ancho)
+        
+        parcial, filas, _ = _preparar_bloque(df_temp)
+        if parcial is None: continue
+        total_filas += filas
+        df_agrupado_total.append(_combinar_parciales([parcial]))
+        
+    if not df_agrupado_total: return pd.DataFrame(), 0
+    df_final_archivo = pd.concat(df_agrupado_total, ignore_index=True)
+    return compactar_tipos(df_final_archivo), total_filas
+
+def procesar_un_archivo(ruta, usar_cache=True, tamano_bloque=TAMANO_BLOQUE_CSV, precarga=None):
+    # precarga: Precarga de precargar_archivos (huella tomada antes de leer y bytes ya en memoria)
     try:
-        if ruta.endswith('.csv'): 
-            dfs_to_process = [pd.read_csv(ruta, dtype=str, header=None)]
-        else: 
-            xls = pd.ExcelFile(ruta)
-            dfs_to_process = [pd.read_excel(xls, sheet_name=s, dtype=str, header=None) for s in xls.sheet_names]
-            
-        df_agrupado_total = []
-        total_filas = 0
+        huella = None
+        contenido = precarga.contenido if precarga is not None else None
+        if usar_cache and CACHE_DISPONIBLE:
+            huella = precarga.huella if precarga is not None else _huella_archivo(ruta)
+            cacheado = _leer_de_cache(huella, contenido)
+            if cacheado is not None: return cacheado
         
-        for df_temp in dfs_to_process:
-            if df_temp.empty: continue
-            best_row = -1
-            max_score = 0
-            
-            for idx, row in df_temp.head(25).iterrows():
-                row_str = " ".join(row.fillna("").astype(str)).lower()
-                if "-zzzz" in row_str or "-999" in row_str or "z.fiscal" in row_str or "ordenado por" in row_str:
-                    continue
-                score = 0
-                non_empty_cols = 0
-                for cell in row.fillna("").astype(str):
-                    c_low = cell.lower().strip()
-                    if c_low:
-                        non_empty_cols += 1
-                        if c_low in ['nombre', 'cliente', 'razon social', 'razón social', 'clientes']: score += 10
-                        if c_low in ['cód.', 'cod.', 'cod', 'código', 'codigo', 'id', 'nro', 'cód']: score += 5
-                        if c_low in ['teléfonos', 'telefono', 'tel', 'cel', 'celular', 'movil', 'contacto']: score += 5
-                        if c_low in ['vendedor', 'vend', 'zona', 'localidad', 'direc', 'domicilio', 'cobrador', 'cobr.']: score += 3
-                
-                final_score = score * (1 if non_empty_cols > 2 else 0)
-                if final_score > max_score:
-                    max_score = final_score
-                    best_row = idx
-            
-            if max_score >= 10: 
-                header_idx = best_row
-                df_temp.columns = df_temp.iloc[header_idx].fillna(pd.Series([f"Col_{i}" for i in range(len(df_temp.columns))])).astype(str)
-                df_temp = df_temp.iloc[header_idx+1:].reset_index(drop=True)
-            else:
-                df_temp.columns = [f"Col_{i}" for i in range(len(df_temp.columns))]
-
-            df_temp = df_temp.dropna(how='all') 
-            if df_temp.empty: continue
-            
-            df_temp = estandarizar_columnas(df_temp)
-            if 'Nombre' not in df_temp.columns: continue
-            
-            total_filas += len(df_temp)
-            df_temp['Row_String'] = df_temp.apply(lambda row: ' | '.join(row.dropna().astype(str)), axis=1)
-            
-            for col in ['Nombre', 'Numero_Cliente', 'Zona_Cruda', 'Vendedor']:
-                if col not in df_temp.columns: df_temp[col] = ""
-                
-            df_temp['Numero_Cliente'] = df_temp['Numero_Cliente'].replace(r'^\s*$', np.nan, regex=True).ffill()
-            df_temp['Numero_Cliente'] = np.where(df_temp['Numero_Cliente'].isna(), "SinID_" + df_temp.index.astype(str), df_temp['Numero_Cliente'])
-            
-            for col in ['Nombre', 'Vendedor', 'Zona_Cruda']:
-                df_temp[col] = df_temp[col].replace([r'^\s*$', 'nan', 'None'], np.nan, regex=True)
-                df_temp[col] = df_temp.groupby('Numero_Cliente')[col].transform(lambda x: x.ffill().bfill())
-                df_temp[col] = df_temp[col].fillna("")
-                
-            text_agg = df_temp.groupby('Numero_Cliente')['Row_String'].apply(lambda x: ' | '.join(x.astype(str))).reset_index()
-            df_agrupado = df_temp.drop_duplicates(subset=['Numero_Cliente']).copy()
-            df_agrupado = df_agrupado.drop(columns=['Row_String']).merge(text_agg, on='Numero_Cliente', how='left')
-            df_agrupado_total.append(df_agrupado)
-            
-        if not df_agrupado_total: return pd.DataFrame(), 0
-        df_final_archivo = pd.concat(df_agrupado_total, ignore_index=True)
+        df_final_archivo, total_filas = leer_y_agrupar_archivo(ruta, tamano_bloque, contenido)
+        if huella is not None: _guardar_en_cache(huella, df_final_archivo, total_filas, contenido)
         return df_final_archivo, total_filas
         
     except Exception as e:
         print(f"Archivo omitido por error: {ruta} -> {e}")
         return pd.DataFrame(), 0
 
-def procesar_cruce(df_maestro, progress_callback=None):
+# ==========================================
+# CACHÉ DE ARCHIVOS YA PARSEADOS
+# ==========================================
+# Cada archivo leído deja su resultado agrupado en un Parquet junto a la base del historial.
+# Índice en SQLite: ruta -> (tamaño, mtime, hash del contenido) y hash -> Parquet.
+# Si la ruta no cambió de tamaño ni de fecha se sirve directo; si cambió la fecha pero el
+# contenido es el mismo (o es una copia del mismo libro en otra carpeta) se reconoce por el hash.
+CARPETA_CACHE = "cache_archivos"
+LIMITE_CACHE_MB = 2048
+# Subir este número cada vez que cambie la detección de encabezados, la estandarización de
+# columnas o el agrupado de leer_y_agrupar_archivo: invalida todo lo cacheado con la lógica vieja.
+VERSION_LECTURA = 5
+
+CACHE_DISPONIBLE = pa is not None # Necesario para escribir/leer Parquet
+
+Huella = namedtuple('Huella', ['ruta', 'tamano', 'mtime_ns'])
+
+def _ruta_carpeta_cache():
+    return os.path.join(os.path.dirname(os.path.abspath(DB_NAME)), CARPETA_CACHE)
+
+def _conectar_cache():
+    conn = sqlite3.connect(DB_NAME, timeout=30)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS cache_rutas (
+            ruta TEXT PRIMARY KEY,
+            tamano INTEGER,
+            mtime_ns INTEGER,
+            hash TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS cache_contenidos (
+            hash TEXT,
+            version INTEGER,
+            archivo TEXT,
+            filas INTEGER,
+            bytes INTEGER,
+            ultimo_uso REAL,
+            PRIMARY KEY (hash, version)
+        )
+    ''')
+    return conn
+
+def _huella_archivo(ruta):
+    st = os.stat(ruta)
+    return Huella(os.path.abspath(ruta), st.st_size, st.st_mtime_ns)
+
+def _hash_contenido(ruta, contenido=None):
+    h = hashlib.blake2b(digest_size=20)
+    if contenido is not None:
+        h.update(contenido)
+        return h.hexdigest()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+def _cargar_contenido(conn, hash_archivo):
+    fila = conn.execute('SELECT archivo, filas FROM cache_contenidos WHERE hash = ? AND version = ?', (hash_archivo, VERSION_LECTURA)).fetchone()
+    if fila is None: return None
+    archivo, filas = fila
+    if archivo is None:
+        df = pd.DataFrame() # El archivo no tenía ninguna hoja con clientes
+    else:
+        ruta_parquet = os.path.join(_ruta_carpeta_cache(), archivo)
+        if not os.path.exists(ruta_parquet):
+            conn.execute('DELETE FROM cache_contenidos WHERE hash = ? AND version = ?', (hash_archivo, VERSION_LECTURA))
+            return None
+        df = pd.read_parquet(ruta_parquet)
+    conn.execute('UPDATE cache_contenidos SET ultimo_uso = ? WHERE hash = ? AND version = ?', (time.time(), hash_archivo, VERSION_LECTURA))
+    return df, filas
+
+def _leer_de_cache(huella, contenido=None):
     try:
-        if progress_callback: progress_callback(5, "Estandarizando memoria en bloque...")
-        df = df_maestro.copy()
-        df['Clave_Agrupacion'] = df['Numero_Cliente'].replace("", np.nan)
-        df['Clave_Agrupacion'] = np.where(df['Clave_Agrupacion'].isna(), df['Nombre'].astype(str) + "_" + df.index.astype(str), df['Clave_Agrupacion'])
-        
-        if progress_callback: progress_callback(15, "Agrupando clientes duplicados en alta velocidad...")
-        for col in ['Nombre', 'Vendedor', 'Zona_Cruda']:
-            df[col] = df[col].replace([r'^\s*$', 'nan', 'None'], np.nan, regex=True)
+        conn = _conectar_cache()
+        try:
+            with conn:
+                fila = conn.execute('SELECT tamano, mtime_ns, hash FROM cache_rutas WHERE ruta = ?', (huella.ruta,)).fetchone()
+                if fila is not None and fila[0] == huella.tamano and fila[1] == huella.mtime_ns:
+                    resultado = _cargar_contenido(conn, fila[2])
+                    if resultado is not None: return resultado
+                
+                # Cambió la fecha o es una ruta nueva: puede ser el mismo contenido ya visto
+                hash_archivo = _hash_contenido(huella.ruta, contenido)
+                resultado = _cargar_contenido(conn, hash_archivo)
+                conn.execute('INSERT OR REPLACE INTO cache_rutas (ruta, tamano, mtime_ns, hash) VALUES (?, ?, ?, ?)',
+                             (huella.ruta, huella.tamano, huella.mtime_ns, hash_archivo))
+                return resultado
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Caché no disponible para {huella.ruta} -> {e}")
+        return None
+
+def _guardar_en_cache(huella, df, filas, contenido=None):
+    try:
+        conn = _conectar_cache()
+        try:
+            with conn:
+                fila = conn.execute('SELECT hash FROM cache_rutas WHERE ruta = ? AND tamano = ? AND mtime_ns = ?',
+                                    (huella.ruta, huella.tamano, huella.mtime_ns)).fetchone()
+                hash_archivo = fila[0] if fila else _hash_contenido(huella.ruta, contenido)
+                archivo, peso = None, 0
+                if not df.empty:
+                    carpeta = _ruta_carpeta_cache()
+                    os.makedirs(carpeta, exist_ok=True)
+                    archivo = f"{hash_archivo}_v{VERSION_LECTURA}.parquet"
+                    temporal = os.path.join(carpeta, archivo + f".{os.getpid()}.tmp")
+                    df.to_parquet(temporal, index=False)
+                    os.replace(temporal, os.path.join(carpeta, archivo))
+                    peso = os.path.getsize(os.path.join(carpeta, archivo))
+                conn.execute('INSERT OR REPLACE INTO cache_rutas (ruta, tamano, mtime_ns, hash) VALUES (?, ?, ?, ?)',
+                             (huella.ruta, huella.tamano, huella.mtime_ns, hash_archivo))
+                conn.execute('INSERT OR REPLACE INTO cache_contenidos (hash, version, archivo, filas, bytes, ultimo_uso) VALUES (?, ?, ?, ?, ?, ?)',
+                             (hash_archivo, VERSION_LECTURA, archivo, filas, peso, time.time()))
+                _recortar_cache(conn)
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"No se pudo cachear {huella.ruta} -> {e}")
+
+def _recortar_cache(conn):
+    # Primero lo escrito con una versión vieja de la lógica, después lo menos usado hasta entrar en el límite
+    viejos = conn.execute('SELECT hash, version, archivo FROM cache_contenidos WHERE version != ?', (VERSION_LECTURA,)).fetchall()
+    total = conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM cache_contenidos WHERE version = ?', (VERSION_LECTURA,)).fetchone()[0]
+    limite = LIMITE_CACHE_MB * 1024 * 1024
+    sobrantes = []
+    if total > limite:
+        for hash_archivo, version, archivo, peso in conn.execute(
+                'SELECT hash, version, archivo, bytes FROM cache_contenidos WHERE version = ? ORDER BY ultimo_uso ASC', (VERSION_LECTURA,)):
+            if total <= limite: break
+            sobrantes.append((hash_archivo, version, archivo))
+            total -= peso
+    for hash_archivo, version, archivo in viejos + sobrantes:
+        conn.execute('DELETE FROM cache_contenidos WHERE hash = ? AND version = ?', (hash_archivo, version))
+        if archivo:
+            try: os.remove(os.path.join(_ruta_carpeta_cache(), archivo))
+            except OSError: pass
+
+def vaciar_cache_archivos():
+    conn = _conectar_cache()
+    try:
+        with conn:
+            archivos = [a for (a,) in conn.execute('SELECT archivo FROM cache_contenidos WHERE archivo IS NOT NULL')]
+            conn.execute('DELETE FROM cache_contenidos')
+            conn.execute('DELETE FROM cache_rutas')
+    finally:
+        conn.close()
+    for archivo in archivos:
+        try: os.remove(os.path.join(_ruta_carpeta_cache(), archivo))
+        except OSError: pass
+
+# ==========================================
+# ESCANEO DE CARPETAS
+# ==========================================
+# Dentro de una carpeta solo se toman los reportes cuyo nombre sugiere una base de clientes
+PALABRAS_CLAVE = ['contacto', 'cliente', 'maestro', 'base', 'padron', 'datos', 'zona', 'giras', 'rutas']
+EXTENSIONES_REPORTE = ('.xlsx', '.xls', '.csv')
+
+# Las carpetas se listan en paralelo con hilos (en un disco de red casi todo el tiempo es espera)
+TRABAJADORES_ESCANEO = 8
+# Manifiesto: por carpeta, su mtime y lo que tenía (reportes que pasan el filtro y subcarpetas).
+# Si el mtime no cambió no se vuelve a listar; alcanza con un stat por carpeta.
+# Una carpeta modificada hace menos de MARGEN_MTIME_NS no se guarda como confiable: en un share
+# con mtime de baja resolución un archivo agregado en ese mismo segundo pasaría desapercibido.
+MARGEN_MTIME_NS = 2 * 10**9
+# Si cambia el filtro, lo guardado en el manifiesto ya no sirve
+FIRMA_FILTRO = hashlib.sha1(json.dumps([PALABRAS_CLAVE, EXTENSIONES_REPORTE]).encode('utf-8')).hexdigest()[:12]
+
+ListadoCarpeta = namedtuple('ListadoCarpeta', ['mtime_ns', 'archivos', 'subcarpetas', 'reutilizado'])
+
+def _es_reporte(nombre):
+    return nombre.endswith(EXTENSIONES_REPORTE) and not nombre.startswith('~$') and any(palabra in nombre.lower() for palabra in PALABRAS_CLAVE)
+
+def _conectar_manifiesto():
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS escaneo_carpetas (
+            ruta TEXT PRIMARY KEY,
+            mtime_ns INTEGER,
+            firma TEXT,
+            archivos TEXT,
+            subcarpetas TEXT
+        )
+    ''')
+    return conn
+
+def _cargar_manifiesto():
+    conn = _conectar_manifiesto()
+    filas = conn.execute('SELECT ruta, mtime_ns, archivos, subcarpetas FROM escaneo_carpetas WHERE firma = ? AND mtime_ns IS NOT NULL', (FIRMA_FILTRO,)).fetchall()
+    conn.close()
+    return {ruta: ListadoCarpeta(mtime, json.loads(archivos), json.loads(subcarpetas), True) for ruta, mtime, archivos, subcarpetas in filas}
+
+def _guardar_manifiesto(listados):
+    if not listados: return
+    ahora = time.time_ns()
+    conn = _conectar_manifiesto()
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO escaneo_carpetas (ruta, mtime_ns, firma, archivos, subcarpetas) VALUES (?, ?, ?, ?, ?)',
+                         [(ruta, l.mtime_ns if ahora - l.mtime_ns > MARGEN_MTIME_NS else None, FIRMA_FILTRO,
+                           json.dumps(l.archivos, ensure_ascii=False), json.dumps(l.subcarpetas, ensure_ascii=False))
+                          for ruta, l in listados.items() if l.mtime_ns is not None])
+    conn.close()
+
+def vaciar_manifiesto_escaneo():
+    conn = _conectar_manifiesto()
+    with conn: conn.execute('DELETE FROM escaneo_carpetas')
+    conn.close()
+
+def _listar_carpeta(ruta, conocido=None):
+    # Como os.walk: los errores de acceso no cortan el escaneo y los symlinks a carpetas no se recorren
+    try:
+        mtime = os.stat(ruta).st_mtime_ns
+    except OSError:
+        return ListadoCarpeta(None, [], [], False)
+    if conocido is not None and conocido.mtime_ns == mtime:
+        return conocido
+    archivos, subcarpetas = [], []
+    try:
+        with os.scandir(ruta) as entradas:
+            for entrada in entradas:
+                try:
+                    es_carpeta = entrada.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if es_carpeta:
+                    subcarpetas.append(entrada.name)
+                elif _es_reporte(entrada.name):
+                    archivos.append(entrada.name)
+    except OSError:
+        return ListadoCarpeta(None, [], [], False)
+    return ListadoCarpeta(mtime, sorted(archivos), sorted(subcarpetas), False)
+
+def escanear_carpetas(rutas, trabajadores=TRABAJADORES_ESCANEO, usar_manifiesto=True, metricas_callback=None):
+    """
+    Va devolviendo los reportes de cada ruta apenas aparecen: las carpetas se recorren (recursivo,
+    filtradas por PALABRAS_CLAVE) y los archivos sueltos pasan tal cual.
+    Cada carpeta listada programa enseguida a sus subcarpetas en el pool, así el árbol se lista en
+    paralelo mientras se consume; el orden de salida es fijo (archivos por nombre y después cada
+    subcarpeta por nombre), así dos escaneos de lo mismo dan el mismo maestro.
+    Con usar_manifiesto, las carpetas cuyo mtime no cambió desde el escaneo anterior no se vuelven a listar.
+    metricas_callback recibe al final la Metrica de la etapa "escaneo".
+    """
+    inicio = iniciar_medicion()
+    manifiesto = _cargar_manifiesto() if usar_manifiesto else {}
+    listados = {}
+    futuros = {}
+    encontrados = 0
+    pool = ThreadPoolExecutor(max_workers=max(1, trabajadores))
+
+    def listar_y_programar(carpeta):
+        listado = _listar_carpeta(carpeta, manifiesto.get(os.path.abspath(carpeta)))
+        for sub in listado.subcarpetas:
+            programar(os.path.join(carpeta, sub))
+        return listado
+
+    def programar(carpeta):
+        try:
+            futuros[carpeta] = pool.submit(listar_y_programar, carpeta)
+        except RuntimeError:
+            pass # el escaneo se cerró antes de terminar
+
+    try:
+        for ruta in rutas:
+            if not os.path.isdir(ruta):
+                encontrados += 1
+                yield ruta
+                continue
+            programar(ruta)
+            pendientes = [ruta]
+            while pendientes:
+                carpeta = pendientes.pop()
+                listado = futuros.pop(carpeta).result()
+                listados[os.path.abspath(carpeta)] = listado
+                for arch in listado.archivos:
+                    encontrados += 1
+                    yield os.path.join(carpeta, arch)
+                pendientes.extend(os.path.join(carpeta, sub) for sub in reversed(listado.subcarpetas))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        if usar_manifiesto:
+            _guardar_manifiesto({ruta: l for ruta, l in listados.items() if not l.reutilizado})
+        if metricas_callback:
+            reutilizadas = sum(1 for l in listados.values() if l.reutilizado)
+            metricas_callback(medir_desde(inicio, "escaneo", 0, encontrados,
+                                          f"{len(listados)} carpetas ({reutilizadas} sin cambios)"))
+
+def expandir_rutas(rutas):
+    """Reemplaza cada carpeta por los Excel/CSV que contiene (recursivo, filtrados por PALABRAS_CLAVE); los archivos sueltos pasan tal cual."""
+    return list(escanear_carpetas(rutas))
+
+# ==========================================
+# LECTURA DE LA COLA EN PARALELO
+# ==========================================
+# Por defecto se deja un núcleo libre para la interfaz
+TRABAJADORES_INGESTA = max(1, (os.cpu_count() or 1) - 1)
+
+def _contexto_procesos():
+    # Los pools no se arrancan con fork: el proceso ya tiene hilos (precarga, escaneo, interfaz) y un
+    # hijo copiado en medio de una operación puede heredar un lock tomado (el de sqlite, por ejemplo)
+    # y quedar colgado. forkserver los crea desde un proceso aparte que ya importó este módulo.
+    # En Windows el único método es spawn.
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    contexto = multiprocessing.get_context('forkserver')
+    contexto.set_forkserver_preload([__name__])
+    return contexto
+
+# Lectura anticipada: mientras se parsea un archivo, un hilo ya va trayendo a memoria los bytes de
+# los siguientes de la cola (en un disco de red la espera de E/S queda tapada por el parseo).
+# BYTES_PRECARGA acota todo lo leído y todavía sin parsear: lo que espera en la cola y lo que ya
+# se mandó a parsear (en el pool, hasta que el proceso devuelve el resultado); 0 la desactiva.
+BYTES_PRECARGA = 256 * 1024 * 1024
+
+Precarga = namedtuple('Precarga', ['huella', 'contenido'])
+
+def _en_cache(huella):
+    # Consulta barata (sin hashear): la ruta no cambió y su resultado sigue cacheado
+    try:
+        conn = _conectar_cache()
+        try:
+            fila = conn.execute('''
+                SELECT c.archivo FROM cache_rutas r
+                JOIN cache_contenidos c ON c.hash = r.hash AND c.version = ?
+                WHERE r.ruta = ? AND r.tamano = ? AND r.mtime_ns = ?
+            ''', (VERSION_LECTURA, huella.ruta, huella.tamano, huella.mtime_ns)).fetchone()
+        finally:
+            conn.close()
+    except Exception:
+        return False
+    return fila is not None and (fila[0] is None or os.path.exists(os.path.join(_ruta_carpeta_cache(), fila[0])))
+
+def precargar_archivos(rutas, limite_bytes=BYTES_PRECARGA, usar_cache=True):
+    """
+    Devuelve (ruta, Precarga, liberar) en el mismo orden de rutas, con el contenido de cada archivo
+    ya leído por un hilo que va adelante de quien consume. Los bytes de un archivo siguen contando
+    hasta que quien consume llama a liberar() (cuando terminó de parsearlo), y el total no pasa de
+    limite_bytes (un archivo más grande que el límite se lee solo cuando no hay otro en memoria).
+    Los que están en la caché sin cambios no se leen (contenido None). Si un archivo no se puede
+    leer se entrega None y el parser lo reintenta por la ruta, que es donde se informa el error.
+    rutas puede ser un generador: lo consume el hilo. Cerrar este generador frena la lectura.
+    """
+    listos = deque()
+    condicion = threading.Condition()
+    estado = {'bytes': 0, 'terminado': False, 'cerrado': False, 'error': None}
+    
+    def lector():
+        try:
+            for ruta in rutas:
+                try:
+                    huella = _huella_archivo(ruta)
+                    if usar_cache and CACHE_DISPONIBLE and _en_cache(huella):
+                        precarga = Precarga(huella, None)
+                    else:
+                        with condicion:
+                            while estado['bytes'] and estado['bytes'] + huella.tamano > limite_bytes and not estado['cerrado']:
+                                condicion.wait()
+                        if estado['cerrado']: break
+                        with open(ruta, 'rb') as f:
+                            precarga = Precarga(huella, f.read())
+                except OSError:
+                    precarga = None
+                with condicion:
+                    if estado['cerrado']: break
+                    listos.append((ruta, precarga))
+                    if precarga is not None and precarga.contenido is not None:
+                        estado['bytes'] += len(precarga.contenido)
+                    condicion.notify_all()
+        except Exception as e:
+            estado['error'] = e
+        finally:
+            if hasattr(rutas, 'close'): rutas.close() # Se cierra desde el mismo hilo que lo itera
+            with condicion:
+                estado['terminado'] = True
+                condicion.notify_all()
+    
+    def _liberador(precarga):
+        pendiente = [precarga is not None and precarga.contenido is not None]
+        def liberar(*_):
+            # Se puede llamar desde otro hilo (callback del pool) y más de una vez
+            with condicion:
+                if not pendiente[0]: return
+                pendiente[0] = False
+                estado['bytes'] -= len(precarga.contenido)
+                condicion.notify_all()
+        return liberar
+    
+    threading.Thread(target=lector, daemon=True).start()
+    try:
+        while True:
+            with condicion:
+                while not listos and not estado['terminado']:
+                    condicion.wait()
+                if not listos:
+                    if estado['error'] is not None: raise estado['error']
+                    return
+                ruta, precarga = listos.popleft()
+            yield ruta, precarga, _liberador(precarga)
+    finally:
+        with condicion:
+            estado['cerrado'] = True
+            condicion.notify_all()
+
+def _procesar_midiendo(ruta, tamano_bloque=TAMANO_BLOQUE_CSV, precarga=None):
+    # Corre en el proceso que parsea, así el tiempo y el pico de memoria son los del archivo
+    inicio = iniciar_medicion()
+    df, filas = procesar_un_archivo(ruta, tamano_bloque=tamano_bloque, precarga=precarga)
+    return df, filas, medir_desde(inicio, "archivo", filas, 1, ruta)
+
+def iterar_archivos_procesados(rutas, trabajadores=1, tamano_bloque=TAMANO_BLOQUE_CSV, metricas_callback=None, limite_precarga=BYTES_PRECARGA):
+    """
+    Procesa las rutas y va devolviendo (ruta, df, filas) EN EL MISMO ORDEN en que se pasaron,
+    así el maestro queda idéntico al de una lectura en serie.
+    Con trabajadores > 1 los archivos se parsean en un pool de procesos; como mucho hay
+    2 archivos por proceso en vuelo, de modo que si quien consume se pausa el pool también frena.
+    rutas puede ser un generador (por ejemplo escanear_carpetas): se consume a medida que hace falta,
+    así la lectura arranca antes de que termine el escaneo.
+    Con limite_precarga > 0 los bytes de los próximos archivos se leen por adelantado (ver
+    precargar_archivos) y el parser trabaja sobre esos buffers en vez de reabrir la ruta; el límite
+    cubre también los archivos que se están parseando.
+    Cerrar el generador (break / close) cancela lo que todavía no arrancó.
+    metricas_callback recibe una Metrica por archivo y, al terminar, la de toda la etapa de lectura.
+    """
+    inicio = iniciar_medicion()
+    filas_totales = 0
+    archivos_leidos = 0
+    entradas = precargar_archivos(rutas, limite_precarga) if limite_precarga else ((ruta, None, _sin_precarga) for ruta in rutas)
+    pool = ProcessPoolExecutor(max_workers=trabajadores, mp_context=_contexto_procesos()) if trabajadores > 1 else None
+    try:
+        if pool is None:
+            resultados = _resultados_en_serie(entradas, tamano_bloque)
+        else:
+            resultados = _resultados_del_pool(pool, entradas, trabajadores, tamano_bloque)
+        for ruta, (df, filas, metrica) in resultados:
+            if metricas_callback: metricas_callback(metrica)
+            filas_totales += filas
+            archivos_leidos += 1
+            yield ruta, df, filas
+    finally:
+        entradas.close()
+        if pool is not None: pool.shutdown(wait=False, cancel_futures=True)
+        if metricas_callback and archivos_leidos:
+            metricas_callback(medir_desde(inicio, "lectura", filas_totales, archivos_leidos))
+
+def _sin_precarga(*_):
+    pass
+
+def _resultados_en_serie(entradas, tamano_bloque):
+    for ruta, precarga, liberar in entradas:
+        try:
+            resultado = _procesar_midiendo(ruta, tamano_bloque, precarga)
+        finally:
+            liberar()
+        yield ruta, resultado
+
+def _enviar_al_pool(pool, ruta, precarga, liberar, tamano_bloque):
+    futuro = pool.submit(_procesar_midiendo, ruta, tamano_bloque, precarga)
+    # Los bytes se liberan cuando el proceso termina, no al consumir el resultado: así la precarga
+    # puede seguir mientras quien consume espera el archivo que va primero
+    futuro.add_done_callback(liberar)
+    return ruta, futuro
+
+def _resultados_del_pool(pool, entradas, trabajadores, tamano_bloque):
+    pendientes = deque()
+    entradas_restantes = iter(entradas)
+    for ruta, precarga, liberar in islice(entradas_restantes, trabajadores * 2):
+        pendientes.append(_enviar_al_pool(pool, ruta, precarga, liberar, tamano_bloque))
+    while pendientes:
+        ruta, futuro = pendientes.popleft()
+        resultado = futuro.result()
+        siguiente = next(entradas_restantes, None)
+        if siguiente is not None:
+            pendientes.append(_enviar_al_pool(pool, *siguiente, tamano_bloque))
+        yield ruta, resultado
+
+# ==========================================
+# TIPOS COMPACTOS DEL MAESTRO
+# ==========================================
+# Pocas variantes repetidas en millones de filas: como categorías se guarda un código por fila
+COLUMNAS_CATEGORICAS = ['Vendedor', 'Zona_Cruda']
+
+try:
+    # Mismo comportamiento que el dtype 'str' de pandas 3 (faltantes = NaN), guardado en Arrow
+    DTYPE_COLUMNA_TEXTO = pd.StringDtype("pyarrow", na_value=np.nan) if pa is not None else None
+except TypeError:
+    DTYPE_COLUMNA_TEXTO = None # pandas viejo: las columnas de texto quedan en object
+
+def compactar_tipos(df):
+    """Pasa Vendedor/Zona_Cruda a categorías y el resto de las columnas de texto a strings Arrow."""
+    if df.empty: return df
+    df = df.copy()
+    for col in df.columns:
+        if col in COLUMNAS_CATEGORICAS:
+            df[col] = df[col].astype('category')
+        elif col != 'Row_String' and DTYPE_COLUMNA_TEXTO is not None and df[col].dtype == object:
+            df[col] = df[col].astype(DTYPE_COLUMNA_TEXTO)
+    return df
+
+def concatenar_maestro(partes):
+    """
+    pd.concat(partes, ignore_index=True) que no pierde las categorías: si cada parte trae categorías
+    distintas, pandas caería a object. Se unifican antes, así solo se recodifican los códigos, y las
+    columnas Arrow se encadenan sin volver a copiar los textos.
+    """
+    partes = [p for p in partes if not p.empty]
+    if not partes: return pd.DataFrame()
+    if len(partes) == 1: return partes[0]
+    
+    for col in COLUMNAS_CATEGORICAS:
+        categorias = [p[col].cat.categories for p in partes if col in p.columns and isinstance(p[col].dtype, pd.CategoricalDtype)]
+        if not categorias: continue
+        dtype = pd.CategoricalDtype(pd.Index(pd.unique(np.concatenate([c.to_numpy(dtype=object) for c in categorias]))))
+        partes = [p.assign(**{col: p[col].astype(dtype) if col in p.columns else pd.Categorical([np.nan] * len(p), dtype=dtype)}) for p in partes]
+    return pd.concat(partes, ignore_index=True)
+
+def memoria_dataframe_mb(df):
+    if isinstance(df, MaestroEnDisco): return 0.0 # Lo que está en disco no ocupa RAM
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+# ==========================================
+# MAESTRO EN DISCO
+# ==========================================
+# Cuando el maestro pasa LIMITE_MAESTRO_MB deja de juntarse en RAM: las filas se escriben en Parquet
+# en una carpeta temporal del disco local, repartidas en particiones por hash de Clave_Agrupacion
+# (todas las filas de un cliente en la misma). Cada partición es una carpeta con un archivo por lote,
+# con la posición de cada fila en el maestro como índice. El cruce después lee de a una partición.
+LIMITE_MAESTRO_MB = 2048
+LOTE_DERRAME_MB = 256 # Ya en disco, las partes se juntan hasta este tamaño antes de escribir otro lote
+PARTICIONES_DISCO = 32
+
+MaestroEnDisco = namedtuple('MaestroEnDisco', ['carpeta', 'particiones', 'filas', 'lotes'])
+
+def crear_maestro_en_disco(particiones=PARTICIONES_DISCO, carpeta_base=None):
+    carpeta = tempfile.mkdtemp(prefix="maestro_", dir=carpeta_base)
+    atexit.register(shutil.rmtree, carpeta, True) # Son archivos de trabajo: no sobreviven al programa
+    return MaestroEnDisco(carpeta, particiones, 0, 0)
+
+def borrar_maestro_en_disco(maestro):
+    shutil.rmtree(maestro.carpeta, ignore_errors=True)
+
+def filas_maestro(maestro):
+    return maestro.filas if isinstance(maestro, MaestroEnDisco) else len(maestro)
+
+def _particion_de_claves(claves, particiones):
+    # hash_array usa una clave fija: la misma clave cae siempre en la misma partición
+    return pd.util.hash_array(claves.to_numpy(dtype=object)) % particiones
+
+def derramar_al_disco(maestro, partes):
+    """Escribe las partes (en orden, a continuación de lo que ya tenía) como un lote nuevo. Devuelve el MaestroEnDisco actualizado."""
+    df = concatenar_maestro(partes)
+    if df.empty: return maestro
+    # Índice global: las claves Nombre_<índice> tienen que ser las del maestro completo
+    df = df.set_axis(pd.RangeIndex(maestro.filas, maestro.filas + len(df)))
+    destino = _particion_de_claves(_claves_agrupacion(df), maestro.particiones)
+    orden = np.argsort(destino, kind='stable')
+    cortes = np.flatnonzero(np.diff(destino[orden])) + 1
+    for posiciones in np.split(orden, cortes):
+        carpeta = os.path.join(maestro.carpeta, f"{destino[posiciones[0]]:03d}")
+        os.makedirs(carpeta, exist_ok=True)
+        df.iloc[posiciones].to_parquet(os.path.join(carpeta, f"{maestro.lotes:06d}.parquet"), index=True)
+    return maestro._replace(filas=maestro.filas + len(df), lotes=maestro.lotes + 1)
+
+def leer_particion(maestro, particion):
+    """Filas de una partición en el orden del maestro, con su posición en el maestro como índice."""
+    carpeta = os.path.join(maestro.carpeta, f"{particion:03d}")
+    if not os.path.isdir(carpeta): return pd.DataFrame()
+    partes = [pd.read_parquet(os.path.join(carpeta, nombre)) for nombre in sorted(os.listdir(carpeta))]
+    if not partes: return pd.DataFrame()
+    posiciones = np.concatenate([p.index.to_numpy() for p in partes])
+    return concatenar_maestro(partes).set_axis(pd.Index(posiciones))
+
+def acumular_maestro(partes, limite_mb=LIMITE_MAESTRO_MB, previo=None, metricas_callback=None):
+    """
+    Junta las partes del maestro (DataFrames de procesar_un_archivo, en orden) a continuación de previo.
+    Mientras todo entra en limite_mb devuelve el mismo DataFrame que concatenar_maestro; si lo pasa,
+    lo juntado hasta ahí y todo lo que sigue va al disco y devuelve un MaestroEnDisco.
+    previo puede ser un DataFrame o un MaestroEnDisco (se le siguen agregando lotes).
+    Sin pyarrow no se puede escribir Parquet y el maestro queda siempre en memoria.
+    """
+    maestro = previo if isinstance(previo, MaestroEnDisco) else None
+    pendientes = [previo] if previo is not None and maestro is None and not previo.empty else []
+    memoria = sum(memoria_dataframe_mb(p) for p in pendientes)
+    for parte in partes:
+        if parte.empty: continue
+        pendientes.append(parte)
+        memoria += memoria_dataframe_mb(parte)
+        limite = limite_mb if maestro is None else min(limite_mb, LOTE_DERRAME_MB)
+        if pa is None or memoria <= limite: continue
+        inicio = iniciar_medicion()
+        if maestro is None: maestro = crear_maestro_en_disco()
+        maestro = derramar_al_disco(maestro, pendientes)
+        if metricas_callback: metricas_callback(medir_desde(inicio, "derrame a disco", sum(len(p) for p in pendientes), 0, f"lote {maestro.lotes}"))
+        pendientes, memoria = [], 0.0
+    
+    if maestro is None: return concatenar_maestro(pendientes)
+    if pendientes: maestro = derramar_al_disco(maestro, pendientes)
+    return maestro
+
+def _vacios_a_nan(serie):
+    # replace([r'^\s*$', 'nan', 'None'], NaN, regex=True); en categorías se aplica una vez por categoría
+    # (replace sobre un Categorical no usa regex y daría otro resultado)
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = pd.Series(serie.cat.categories.to_numpy(dtype=object), dtype=object)
+        limpias = categorias.replace([r'^\s*$', 'nan', 'None'], np.nan, regex=True).to_numpy(dtype=object)
+        codigos = serie.cat.codes.to_numpy()
+        valores = np.where(codigos >= 0, limpias[codigos], np.nan)
+        return pd.Series(valores, index=serie.index, dtype=object, name=serie.name)
+    return serie.replace([r'^\s*$', 'nan', 'None'], np.nan, regex=True)
+
+# ==========================================
+# MOTOR DE CRUCE (AGRUPACIÓN + ENRIQUECIMIENTO)
+# ==========================================
+MODO_VECTORIZADO = "vectorizado"
+MODO_REFERENCIA = "referencia"
+
+COLUMNAS_TELEFONOS = ['Primer número', 'Segundo número', 'Tercer número', 'Cuarto número', 'Quinto número']
+COLUMNAS_SALIDA = ['Nombre', 'Número de cliente', 'Zona del cliente', 'Vendedor'] + COLUMNAS_TELEFONOS
+
+PATRON_SEPARADORES_TEL = re.compile(r'//|/|\*|_|cel:?|tel:?|móvil:?|movil:?|contacto:?|;|,|\|', flags=re.IGNORECASE)
+
+@lru_cache(maxsize=1)
+def _patron_no_digitos():
+    # str.isdigit() también acepta superíndices y similares (²,①...) que \d no reconoce
+    extra = ''.join(chr(i) for i in range(0x110000) if chr(i).isdigit() and not chr(i).isdecimal())
+    return re.compile(r'[^\d' + re.escape(extra) + r']')
+
+def _como_texto(serie):
+    # Igual que str(valor) fila por fila, pero dejando la columna en dtype object
+    # para que los .str usen el motor 're' de Python (mismo \b y .upper() que el modo referencia).
+    return pd.Series([str(x) for x in serie.to_numpy(dtype=object)], index=serie.index, dtype=object)
+
+def _texto_arrow(textos):
+    # Devuelve los textos como array Arrow sin copiar si ya vienen en Arrow; None si hay nulos o no son texto
+    if pa is None: return None
+    try:
+        arr = pa.array(textos.array) if isinstance(textos, pd.Series) else pa.array(np.asarray(textos, dtype=object))
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+    if isinstance(arr, pa.ChunkedArray): arr = arr.combine_chunks()
+    if arr.null_count or not (pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type)): return None
+    return arr.cast(pa.large_string())
+
+def _unir_textos_por_grupo(claves, textos):
+    # Equivale a groupby(claves)[textos].apply(' | '.join) pero sin armar una Series por grupo:
+    # ordena una sola vez (estable, respeta el orden original) y une rebanadas contiguas.
+    # Devuelve un texto por clave, en orden de primera aparición.
+    codigos, unicos = pd.factorize(claves)
+    if len(codigos) == 0: return pd.Series([], index=unicos, dtype=DTYPE_TEXTO)
+    orden = np.argsort(codigos, kind='stable')
+    cortes = np.flatnonzero(np.diff(codigos[orden])) + 1
+    inicios = np.concatenate(([0], cortes))
+    fines = np.concatenate((cortes, [len(codigos)]))
+    
+    arr = _texto_arrow(textos)
+    if arr is not None:
+        # Cada grupo es una lista dentro del buffer reordenado; binary_join la une sin pasar por objetos Python
+        listas = pa.LargeListArray.from_arrays(pa.array(np.append(inicios, len(codigos)), type=pa.int64()), arr.take(pa.array(orden)))
+        return pd.Series(pc.binary_join(listas, pa.scalar(' | ', pa.large_string())), index=unicos, dtype=DTYPE_TEXTO)
+    
+    valores = [str(x) for x in np.asarray(textos, dtype=object)[orden]]
+    unidos = [' | '.join(valores[i:f]) for i, f in zip(inicios, fines)]
+    return pd.Series(unidos, index=unicos, dtype=object)
+
+def _claves_agrupacion(df):
+    # Número de cliente, o Nombre_<índice> cuando viene vacío (el índice es la posición en el maestro)
+    clave = df['Numero_Cliente'].replace("", np.nan)
+    # dtype object: isin/factorize sobre claves usan la tabla hash de numpy y no el camino lento de Arrow
+    return pd.Series(np.where(clave.isna(), df['Nombre'].astype(str) + "_" + df.index.astype(str), clave), index=df.index, dtype=object)
+
+def _agrupar_maestro(df_maestro, progress_callback=None, modo=MODO_VECTORIZADO):
+    if progress_callback: progress_callback(5, "Estandarizando memoria en bloque...")
+    df = df_maestro.copy()
+    df['Clave_Agrupacion'] = _claves_agrupacion(df)
+    
+    if progress_callback: progress_callback(15, "Agrupando clientes duplicados en alta velocidad...")
+    for col in ['Nombre', 'Vendedor', 'Zona_Cruda']:
+        df[col] = _vacios_a_nan(df[col])
+        if modo == MODO_REFERENCIA:
             df[col] = df.groupby('Clave_Agrupacion')[col].transform(lambda x: x.ffill().bfill()).fillna("")
-            
+        else:
+            # ffill + bfill dentro del grupo == primer valor no nulo del grupo hacia atrás; sin lambdas por grupo
+            df[col] = df[col].groupby(df['Clave_Agrupacion']).ffill()
+            df[col] = df[col].groupby(df['Clave_Agrupacion']).bfill().fillna("")
+    
+    df_agrupado = df.drop_duplicates(subset=['Clave_Agrupacion']).copy()
+    if modo == MODO_REFERENCIA:
         text_agg = df.groupby('Clave_Agrupacion')['Row_String'].apply(lambda x: ' | '.join(x.astype(str))).reset_index()
-        df_agrupado = df.drop_duplicates(subset=['Clave_Agrupacion']).copy()
         df_agrupado = df_agrupado.drop(columns=['Row_String']).merge(text_agg, on='Clave_Agrupacion', how='left')
+    else:
+        text_agg = _unir_textos_por_grupo(df['Clave_Agrupacion'], df['Row_String'])
+        df_agrupado = df_agrupado.drop(columns=['Row_String'])
+        df_agrupado['Row_String'] = text_agg.set_axis(df_agrupado.index)
+        df_agrupado = df_agrupado.reset_index(drop=True)
+    return df_agrupado
+
+def _enriquecer_referencia(df_agrupado, config, progress_callback=None):
+    datos_procesados = []
+    total_filas = len(df_agrupado)
+    paso_progreso = max(1, total_filas // 20)
+    
+    for idx, (_, row) in enumerate(df_agrupado.iterrows()):
+        if progress_callback and total_filas > 0:
+            if idx % paso_progreso == 0:
+                progress_callback(15 + int((idx / total_filas) * 85), f"Procesando cliente {idx} de {total_filas}...")
+
+        n = str(row['Nombre']).strip()
+        c = str(row['Numero_Cliente']).strip()
+        v = str(row['Vendedor']).strip()
+        zona_o_cobr = str(row.get('Zona_Cruda', '')).strip()
+        texto_total = str(row['Row_String'])
         
-        datos_procesados = []
-        total_filas = len(df_agrupado)
-        paso_progreso = max(1, total_filas // 20)
+        telefonos_encontrados = separar_telefonos(texto_total)
+        zona_enriquecida = extraer_zona_referencia(texto_total, zona_o_cobr)
         
-        for idx, (_, row) in enumerate(df_agrupado.iterrows()):
-            if progress_callback and total_filas > 0:
-                if idx % paso_progreso == 0:
-                    progress_callback(15 + int((idx / total_filas) * 85), f"Procesando cliente {idx} de {total_filas}...")
-
-            n = str(row['Nombre']).strip()
-            c = str(row['Numero_Cliente']).strip()
-            v = str(row['Vendedor']).strip()
-            zona_o_cobr = str(row.get('Zona_Cruda', '')).strip()
-            texto_total = str(row['Row_String'])
-            
-            telefonos_encontrados = separar_telefonos(texto_total)
-            zona_enriquecida = extraer_zona_inteligente(texto_total, zona_o_cobr)
-            
-            # --- ACÁ BUSCAMOS EL VENDEDOR ---
-            vend_f = extraer_vendedor_inteligente(texto_total, v, zona_o_cobr)
-            
-            if n == "" and c.startswith("SinID_") and len(telefonos_encontrados) == 0: continue
-            if "cód." in n.lower() or "fecha:" in n.lower() or "hoja:" in n.lower() or "wood tools" in n.lower(): continue
-            if "clientes habilitados" in n.lower() or "ordenado por" in n.lower(): continue
+        # --- ACÁ BUSCAMOS EL VENDEDOR ---
+        vend_f = extraer_vendedor_referencia(texto_total, v, zona_o_cobr, config.vinculos)
+        
+        if n == "" and c.startswith("SinID_") and len(telefonos_encontrados) == 0: continue
+        if "cód." in n.lower() or "fecha:" in n.lower() or "hoja:" in n.lower() or "wood tools" in n.lower(): continue
+        if "clientes habilitados" in n.lower() or "ordenado por" in n.lower(): continue
+        
+        registro = {
+            'Nombre': n if n != "" else "Cliente Sin Nombre",
+            'Número de cliente': c if not c.startswith("SinID_") else "",
+            'Zona del cliente': zona_enriquecida,
+            'Vendedor': vend_f, 
+            'Primer número': telefonos_encontrados[0] if len(telefonos_encontrados) > 0 else "",
+            'Segundo número': telefonos_encontrados[1] if len(telefonos_encontrados) > 1 else "",
+            'Tercer número': telefonos_encontrados[2] if len(telefonos_encontrados) > 2 else "",
+            'Cuarto número': telefonos_encontrados[3] if len(telefonos_encontrados) > 3 else "",
+            'Quinto número': telefonos_encontrados[4] if len(telefonos_encontrados) > 4 else ""
+        }
+        datos_procesados.append(registro)
+    return pd.DataFrame(datos_procesados)
+
+def separar_telefonos_serie(textos):
+    """Versión columnar de separar_telefonos: devuelve un DataFrame con las 5 columnas de teléfonos."""
+    salida = pd.DataFrame("", index=textos.index, columns=COLUMNAS_TELEFONOS, dtype=object)
+    texto = _como_texto(textos).str.strip()
+    texto = texto.str.replace(r'\b\d{2}-\d{8}-\d{1}\b', '', regex=True)
+    texto = texto.str.replace(r'\b\d{2}/\d{2}/\d{4}\b', '', regex=True)
+    texto = texto.where(textos.notna(), "")
+    
+    partes = texto.str.split(PATRON_SEPARADORES_TEL, regex=True).explode()
+    nums = partes.str.replace(_patron_no_digitos(), '', regex=True)
+    largo = nums.str.len()
+    nums = nums[(largo >= 8) & (largo <= 15) & ~nums.str.startswith("000")]
+    if nums.empty: return salida
+    
+    # Índice repetido = fila original; drop_duplicates conserva el orden de aparición
+    pares = pd.DataFrame({'fila': nums.index, 'tel': nums.values}).drop_duplicates()
+    pares['pos'] = pares.groupby('fila').cumcount()
+    pares = pares[pares['pos'] < len(COLUMNAS_TELEFONOS)]
+    tabla = pares.pivot(index='fila', columns='pos', values='tel')
+    for pos in tabla.columns:
+        col = tabla[pos].dropna()
+        salida.loc[col.index, COLUMNAS_TELEFONOS[pos]] = col.values
+    return salida
+
+def extraer_zona_serie(textos, zonas_crudas):
+    """Versión columnar de extraer_zona_inteligente, con la misma prioridad de reglas."""
+    zc = _como_texto(zonas_crudas)
+    resultado = buscar_zonas_serie((_como_texto(textos) + " | " + zc).str.upper())
+    zc = zc.str.strip()
+    resultado = resultado.fillna(zc.where((zc != "") & (zc.str.lower() != 'nan')))
+    return resultado.fillna("Desconocida")
+
+def extraer_vendedor_serie(textos, vendedores, zonas_o_cobradores, vinculos=None):
+    """
+    Versión columnar de extraer_vendedor_inteligente, con la misma prioridad de reglas.
+    Las reglas compiladas se evalúan en una sola pasada por fila: encadenar un .str por regla
+    sobre dtype object recorre los datos una vez por regla y resulta más lento.
+    """
+    if vinculos is None: vinculos = cargar_vinculos_zonas()
+    asignados = [extraer_vendedor_inteligente(t, v, z, vinculos) for t, v, z in
+                 zip(textos.to_numpy(dtype=object), vendedores.to_numpy(dtype=object), zonas_o_cobradores.to_numpy(dtype=object))]
+    return pd.Series(asignados, index=textos.index, dtype=object)
+
+def _enriquecer_columnas(df_agrupado, config, progress_callback=None):
+    # Enriquece todos los grupos y devuelve (resultado, descartar) alineados con df_agrupado,
+    # sin filtrar: el cruce incremental necesita saber también qué grupos quedaron descartados.
+    n = _como_texto(df_agrupado['Nombre']).str.strip()
+    c = _como_texto(df_agrupado['Numero_Cliente']).str.strip()
+    v = _como_texto(df_agrupado['Vendedor']).str.strip()
+    zona_o_cobr = _como_texto(df_agrupado['Zona_Cruda'] if 'Zona_Cruda' in df_agrupado.columns else pd.Series("", index=df_agrupado.index)).str.strip()
+    texto_total = _como_texto(df_agrupado['Row_String'])
+    
+    if progress_callback: progress_callback(30, "Extrayendo teléfonos en bloque...")
+    telefonos = separar_telefonos_serie(texto_total)
+    if progress_callback: progress_callback(55, "Enriqueciendo zonas en bloque...")
+    zonas = extraer_zona_serie(texto_total, zona_o_cobr)
+    if progress_callback: progress_callback(75, "Asignando vendedores en bloque...")
+    vendedores = extraer_vendedor_serie(texto_total, v, zona_o_cobr, config.vinculos)
+    
+    if progress_callback: progress_callback(90, "Descartando encabezados y filas vacías...")
+    sin_id = c.str.startswith("SinID_")
+    n_low = n.str.lower()
+    descartar = (n == "") & sin_id & (telefonos['Primer número'] == "")
+    for basura in ["cód.", "fecha:", "hoja:", "wood tools", "clientes habilitados", "ordenado por"]:
+        descartar |= n_low.str.contains(basura, regex=False)
+    
+    resultado = pd.DataFrame({
+        'Nombre': n.where(n != "", "Cliente Sin Nombre"),
+        'Número de cliente': c.where(~sin_id, ""),
+        'Zona del cliente': zonas,
+        'Vendedor': vendedores,
+    })
+    resultado = pd.concat([resultado, telefonos], axis=1)
+    return resultado[COLUMNAS_SALIDA], descartar
+
+def _enriquecer_vectorizado(df_agrupado, config, progress_callback=None):
+    if df_agrupado.empty: return pd.DataFrame()
+    resultado, descartar = _enriquecer_columnas(df_agrupado, config, progress_callback)
+    resultado = resultado[~descartar]
+    if resultado.empty: return pd.DataFrame()
+    return resultado.reset_index(drop=True)
+
+def procesar_cruce(df_maestro, progress_callback=None, modo=MODO_VECTORIZADO, config=None, metricas_callback=None, persistir=False, unificar=False, trabajadores=1):
+    """
+    Agrupa df_maestro por cliente y enriquece teléfonos, zona y vendedor.
+    modo=MODO_VECTORIZADO trabaja por columnas completas; MODO_REFERENCIA es el
+    recorrido fila por fila original, que se mantiene para comparar resultados.
+    config es un SnapshotConfig; si no se pasa se toma uno al arrancar y se usa en todo el cruce.
+    metricas_callback recibe la Metrica de la agrupación y la del enriquecimiento.
+    persistir=True además deja el resultado en la base unificada de SQLite (ver guardar_base_unificada).
+    unificar=True junta los clientes repetidos entre archivos por teléfono (ver unificar_clientes).
+    trabajadores > 1 reparte el motor vectorizado en procesos (ver _cruzar_en_particiones).
+    df_maestro también puede ser un MaestroEnDisco (ver acumular_maestro): se cruza partición por
+    partición con el motor vectorizado, sin cargarlo entero.
+    """
+    try:
+        if config is None: config = obtener_snapshot_config()
+        if isinstance(df_maestro, MaestroEnDisco):
+            df_final = _final_desde_estado(_cruzar_en_disco(df_maestro, config, trabajadores, progress_callback, metricas_callback))
+            return _terminar_cruce(df_final, progress_callback, metricas_callback, persistir, unificar)
+        if modo != MODO_REFERENCIA and _conviene_particionar(df_maestro, trabajadores):
+            df_final = _final_desde_estado(_cruzar_en_particiones(df_maestro, config, trabajadores, progress_callback, metricas_callback))
+            return _terminar_cruce(df_final, progress_callback, metricas_callback, persistir, unificar)
+        inicio = iniciar_medicion()
+        df_agrupado = _agrupar_maestro(df_maestro, progress_callback, modo)
+        if metricas_callback: metricas_callback(medir_desde(inicio, "agrupación", len(df_maestro)))
+        inicio = iniciar_medicion()
+        if modo == MODO_REFERENCIA:
+            df_final = _enriquecer_referencia(df_agrupado, config, progress_callback)
+        else:
+            df_final = _enriquecer_vectorizado(df_agrupado, config, progress_callback)
+        if metricas_callback: metricas_callback(medir_desde(inicio, "enriquecimiento", len(df_agrupado)))
+        return _terminar_cruce(df_final, progress_callback, metricas_callback, persistir, unificar)
+    except Exception as e:
+        raise RuntimeError(f"Falla en el motor de cruce: {str(e)}")
+
+def _terminar_cruce(df_final, progress_callback=None, metricas_callback=None, persistir=False, unificar=False):
+    if unificar: df_final = unificar_clientes(df_final, progress_callback, metricas_callback)
+    if persistir:
+        if progress_callback: progress_callback(95, "Guardando la base unificada...")
+        guardar_base_unificada(df_final)
+    if progress_callback: progress_callback(100, "¡Cruce finalizado!")
+    return df_final
+
+# ==========================================
+# CRUCE INCREMENTAL
+# ==========================================
+# resultados: una fila por Clave_Agrupacion (en orden de primera aparición), con las columnas de salida
+# y la marca 'Descartada'. claves: la clave de cada fila del maestro ya cruzada. huella: hash del
+# contenido de esas filas, para no mezclar el estado con un maestro distinto del mismo largo o más.
+EstadoCruce = namedtuple('EstadoCruce', ['resultados', 'claves', 'version_config', 'huella'])
+
+def _hashes_filas(df_maestro):
+    # Un hash por fila de las columnas que usa el cruce; depende solo de los valores de cada fila
+    columnas = [c for c in COLUMNAS_CRUCE if c in df_maestro.columns]
+    if not columnas: return np.zeros(len(df_maestro), dtype=np.uint64)
+    return pd.util.hash_pandas_object(df_maestro[columnas], index=False).to_numpy()
+
+def _huella(hashes):
+    return hashlib.blake2b(np.ascontiguousarray(hashes).tobytes(), digest_size=16).hexdigest()
+
+def _estado_vigente(estado, hashes, config):
+    """El estado sirve si la configuración es la misma y las primeras filas del maestro son las que se cruzaron."""
+    return (estado is not None and estado.version_config == config.version
+            and len(estado.claves) <= len(hashes) and _huella(hashes[:len(estado.claves)]) == estado.huella)
+
+def _cruzar_por_clave(df_maestro, config, progress_callback=None, metricas_callback=None, trabajadores=1):
+    if _conviene_particionar(df_maestro, trabajadores):
+        return _cruzar_en_particiones(df_maestro, config, trabajadores, progress_callback, metricas_callback)
+    inicio = iniciar_medicion()
+    df_agrupado = _agrupar_maestro(df_maestro, progress_callback, MODO_VECTORIZADO)
+    if metricas_callback: metricas_callback(medir_desde(inicio, "agrupación", len(df_maestro)))
+    return _enriquecer_por_clave(df_agrupado, config, progress_callback, metricas_callback)
+
+def _enriquecer_por_clave(df_agrupado, config, progress_callback=None, metricas_callback=None):
+    if df_agrupado.empty: return pd.DataFrame(columns=COLUMNAS_SALIDA + ['Descartada'])
+    inicio = iniciar_medicion()
+    resultado, descartar = _enriquecer_columnas(df_agrupado, config, progress_callback)
+    if metricas_callback: metricas_callback(medir_desde(inicio, "enriquecimiento", len(df_agrupado)))
+    resultado = resultado.assign(Descartada=descartar.to_numpy())
+    return resultado.set_axis(pd.Index(df_agrupado['Clave_Agrupacion'], dtype=object, name='Clave_Agrupacion'))
+
+def _final_desde_estado(resultados):
+    final = resultados.loc[~resultados['Descartada'].astype(bool), COLUMNAS_SALIDA]
+    if final.empty: return pd.DataFrame()
+    return final.reset_index(drop=True)
+
+def procesar_cruce_incremental(df_maestro, estado=None, progress_callback=None, config=None, metricas_callback=None, persistir=False, unificar=False, trabajadores=1):
+    """
+    Igual que procesar_cruce (motor vectorizado), pero reutiliza el estado del cruce anterior:
+    si df_maestro solo creció por abajo, reagrupa y re-enriquece únicamente las claves que tocan
+    las filas nuevas y las mezcla con lo ya calculado. Devuelve (df_final, estado nuevo).
+    Si cambió la configuración de vínculos/celulares o las primeras filas ya no son las del cruce
+    anterior (el maestro se achicó o es otro), recalcula todo.
+    metricas_callback, persistir, unificar y trabajadores funcionan igual que en procesar_cruce; la
+    unificación se rehace sobre el resultado completo porque una fila nueva puede juntar clientes ya cruzados.
+    Un MaestroEnDisco no guarda estado: se cruza entero con procesar_cruce y el estado devuelto es None.
+    """
+    if isinstance(df_maestro, MaestroEnDisco):
+        return procesar_cruce(df_maestro, progress_callback, config=config, metricas_callback=metricas_callback, persistir=persistir, unificar=unificar, trabajadores=trabajadores), None
+    try:
+        if config is None: config = obtener_snapshot_config()
+        hashes = _hashes_filas(df_maestro)
+        completo = not _estado_vigente(estado, hashes, config)
+        
+        if completo:
+            resultados = _cruzar_por_clave(df_maestro, config, progress_callback, metricas_callback, trabajadores)
+            claves = _claves_agrupacion(df_maestro)
+        else:
+            filas_nuevas = df_maestro.iloc[len(estado.claves):]
+            if filas_nuevas.empty:
+                df_final = _final_desde_estado(estado.resultados)
+                if unificar: df_final = unificar_clientes(df_final, progress_callback, metricas_callback)
+                if progress_callback: progress_callback(100, "¡Cruce finalizado!")
+                return df_final, estado
             
-            registro = {
-                'Nombre': n if n != "" else "Cliente Sin Nombre",
-                'Número de cliente': c if not c.startswith("SinID_") else "",
-                'Zona del cliente': zona_enriquecida,
-                'Vendedor': vend_f, 
-                'Primer número': telefonos_encontrados[0] if len(telefonos_encontrados) > 0 else "",
-                'Segundo número': telefonos_encontrados[1] if len(telefonos_encontrados) > 1 else "",
-                'Tercer número': telefonos_encontrados[2] if len(telefonos_encontrados) > 2 else "",
-                'Cuarto número': telefonos_encontrados[3] if len(telefonos_encontrados) > 3 else "",
-                'Quinto número': telefonos_encontrados[4] if len(telefonos_encontrados) > 4 else ""
-            }
-            datos_procesados.append(registro)
+            claves = pd.concat([estado.claves, _claves_agrupacion(filas_nuevas)])
+            tocadas = pd.unique(claves.iloc[len(estado.claves):])
+            # Todas las filas (viejas y nuevas) de las claves tocadas, en el orden del maestro
+            parcial = _cruzar_por_clave(df_maestro[claves.isin(tocadas).to_numpy()], config, progress_callback, metricas_callback, trabajadores)
             
+            resultados = estado.resultados
+            existentes = parcial.index.isin(resultados.index)
+            if existentes.any():
+                resultados = resultados.copy()
+                resultados.loc[parcial.index[existentes]] = parcial[existentes]
+            # Las claves nuevas aparecen por primera vez después de todo lo ya cruzado
+            resultados = pd.concat([resultados, parcial[~existentes]])
+        
+        df_final = _final_desde_estado(resultados)
+        if unificar: df_final = unificar_clientes(df_final, progress_callback, metricas_callback)
+        if persistir:
+            if progress_callback: progress_callback(95, "Guardando la base unificada...")
+            guardar_base_unificada(df_final)
         if progress_callback: progress_callback(100, "¡Cruce finalizado!")
-        return pd.DataFrame(datos_procesados)
+        return df_final, EstadoCruce(resultados, claves, config.version, _huella(hashes))
     except Exception as e:
         raise RuntimeError(f"Falla en el motor de cruce: {str(e)}")
 
+# ==========================================
+# CRUCE EN PARALELO POR PARTICIONES
+# ==========================================
+# Todas las filas de un cliente caen en la misma partición (hash de Clave_Agrupacion), así cada
+# proceso agrupa y enriquece sus clientes sin mirar a los demás. Los resultados se vuelven a poner
+# en el orden de primera aparición del maestro: da lo mismo que el cruce en un solo proceso.
+FILAS_MINIMAS_PARTICIONADO = 50000 # Con menos filas pesa más arrancar los procesos que el cruce
+PARTICIONES_POR_TRABAJADOR = 2 # Más particiones que procesos: el avance es más parejo
+COLUMNAS_CRUCE = ['Numero_Cliente', 'Nombre', 'Vendedor', 'Zona_Cruda', 'Row_String']
+
+def _conviene_particionar(df_maestro, trabajadores):
+    return trabajadores > 1 and len(df_maestro) >= FILAS_MINIMAS_PARTICIONADO
+
+def _cruzar_particion(particion, vinculos, vendedores, version):
+    # Corre en otro proceso: MappingProxyType no viaja por pickle, se rearma la foto de la configuración
+    inicio = iniciar_medicion()
+    config = SnapshotConfig(MappingProxyType(vinculos), MappingProxyType(vendedores), version)
+    return _cruzar_por_clave(particion, config), medir_desde(inicio, "cruce partición", len(particion))
+
+def _cruzar_en_particiones(df_maestro, config, trabajadores, progress_callback=None, metricas_callback=None):
+    """
+    _cruzar_por_clave repartido en un pool de procesos. Devuelve lo mismo: una fila por
+    Clave_Agrupacion en orden de primera aparición, con las columnas de salida y 'Descartada'.
+    progress_callback recibe el avance combinado de todas las particiones.
+    """
+    inicio = iniciar_medicion()
+    if progress_callback: progress_callback(5, "Repartiendo clientes entre procesos...")
+    claves = _claves_agrupacion(df_maestro)
+    n_particiones = trabajadores * PARTICIONES_POR_TRABAJADOR
+    destino = _particion_de_claves(claves, n_particiones)
+    orden = np.argsort(destino, kind='stable')
+    cortes = np.flatnonzero(np.diff(destino[orden])) + 1
+    primeras = ~claves.duplicated().to_numpy()
+    df_cruce = df_maestro[[c for c in COLUMNAS_CRUCE if c in df_maestro.columns]]
+    
+    pool = ProcessPoolExecutor(max_workers=trabajadores, mp_context=_contexto_procesos())
+    try:
+        futuros = {}
+        for posiciones in np.split(orden, cortes):
+            # Las posiciones quedan crecientes: cada partición conserva el orden del maestro (y su índice)
+            particion = df_cruce.iloc[posiciones]
+            futuro = pool.submit(_cruzar_particion, particion, dict(config.vinculos), dict(config.vendedores), config.version)
+            futuros[futuro] = posiciones[primeras[posiciones]]
+        if metricas_callback: metricas_callback(medir_desde(inicio, "particionado", len(df_maestro), 0, f"{len(futuros)} particiones"))
+        
+        partes = []
+        filas_hechas = 0
+        for hechas, futuro in enumerate(as_completed(futuros), start=1):
+            resultados, metrica = futuro.result()
+            if metricas_callback: metricas_callback(metrica)
+            # Primera aparición de cada cliente de la partición, alineada con sus resultados
+            partes.append((futuros[futuro], resultados))
+            filas_hechas += metrica.filas
+            if progress_callback:
+                progress_callback(15 + int(75 * filas_hechas / len(df_maestro)), f"Cruzando en paralelo: {hechas} de {len(futuros)} particiones listas...")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    partes = [(p, r) for p, r in partes if not r.empty]
+    if not partes: return pd.DataFrame(columns=COLUMNAS_SALIDA + ['Descartada'])
+    resultados = pd.concat([r for _, r in partes])
+    resultados = resultados.iloc[np.argsort(np.concatenate([p for p, _ in partes]), kind='stable')]
+    if metricas_callback: metricas_callback(medir_desde(inicio, "cruce en paralelo", len(df_maestro), 0, f"{trabajadores} procesos"))
+    return resultados
+
+# ==========================================
+# CRUCE DEL MAESTRO EN DISCO
+# ==========================================
+# Con el maestro en disco cada partición se lee, se cruza y se suelta antes de pasar a la siguiente:
+# en memoria queda una partición (una por proceso con trabajadores > 1) más el resultado.
+def _cruzar_particion_en_disco(maestro, particion, vinculos, vendedores, version):
+    df = leer_particion(maestro, particion)
+    if df.empty: return pd.DataFrame(), np.empty(0, dtype=np.int64), None
+    resultados, metrica = _cruzar_particion(df, vinculos, vendedores, version)
+    # Posición de la primera fila de cada cliente, alineada con sus resultados
+    primeras = df.index.to_numpy()[~_claves_agrupacion(df).duplicated().to_numpy()]
+    return resultados, primeras, metrica
+
+def _cruzar_en_disco(maestro, config, trabajadores=1, progress_callback=None, metricas_callback=None):
+    """Igual que _cruzar_por_clave pero partición por partición sobre un MaestroEnDisco."""
+    inicio = iniciar_medicion()
+    argumentos = (dict(config.vinculos), dict(config.vendedores), config.version)
+    pool = ProcessPoolExecutor(max_workers=trabajadores, mp_context=_contexto_procesos()) if trabajadores > 1 else None
+    try:
+        if pool is None:
+            cruzadas = (_cruzar_particion_en_disco(maestro, p, *argumentos) for p in range(maestro.particiones))
+        else:
+            futuros = [pool.submit(_cruzar_particion_en_disco, maestro, p, *argumentos) for p in range(maestro.particiones)]
+            cruzadas = (futuro.result() for futuro in as_completed(futuros))
+        
+        partes = []
+        filas_hechas = 0
+        for hechas, (resultados, primeras, metrica) in enumerate(cruzadas, start=1):
+            if metrica is not None:
+                if metricas_callback: metricas_callback(metrica)
+                filas_hechas += metrica.filas
+            if not resultados.empty: partes.append((primeras, resultados))
+            if progress_callback:
+                progress_callback(5 + int(85 * filas_hechas / max(maestro.filas, 1)), f"Cruzando desde el disco: {hechas} de {maestro.particiones} particiones...")
+    finally:
+        if pool is not None: pool.shutdown(wait=False, cancel_futures=True)
+    
+    if not partes: return pd.DataFrame(columns=COLUMNAS_SALIDA + ['Descartada'])
+    resultados = pd.concat([r for _, r in partes])
+    resultados = resultados.iloc[np.argsort(np.concatenate([p for p, _ in partes]), kind='stable')]
+    if metricas_callback: metricas_callback(medir_desde(inicio, "cruce en disco", maestro.filas, 0, f"{maestro.particiones} particiones"))
+    return resultados
+
+# ==========================================
+# CRUCE EN PARALELO CON LA LECTURA
+# ==========================================
+# Cada archivo se agrupa apenas llega (en un hilo aparte, mientras se siguen parseando los demás) con
+# las mismas claves que el maestro completo, y se enriquecen los clientes que aparecen por primera vez.
+# Un cliente que solo está en un archivo ya queda con su resultado final; los que reaparecen en otro
+# no se vuelven a enriquecer en cada archivo: se cruzan una sola vez al final, con todas sus filas.
+def _cruzar_parte(parte, config, vistas):
+    # vistas: claves de las partes anteriores. Las partes se cruzan de a una (un solo hilo), en orden
+    inicio = iniciar_medicion()
+    df_agrupado = _agrupar_maestro(parte)
+    claves_grupo = df_agrupado['Clave_Agrupacion'] if not df_agrupado.empty else pd.Series([], dtype=object)
+    ya_vistas = claves_grupo.isin(vistas).to_numpy()
+    vistas.update(claves_grupo[~ya_vistas])
+    parcial = _enriquecer_por_clave(df_agrupado[~ya_vistas], config)
+    return parcial, _claves_agrupacion(parte), claves_grupo[ya_vistas].tolist(), medir_desde(inicio, "cruce parcial", len(parte), 1)
+
+def cruzar_en_streaming(partes, df_maestro=None, estado=None, progress_callback=None, config=None, metricas_callback=None, persistir=False, unificar=False, trabajadores=1):
+    """
+    Cruza a medida que se leen los archivos en vez de esperar al maestro completo.
+    partes es un iterable (por ejemplo un generador sobre iterar_archivos_procesados) con los
+    DataFrames de procesar_un_archivo en el orden de la cola; df_maestro y estado son lo ya cargado
+    y cruzado antes, como en procesar_cruce_incremental.
+    El cruce de cada parte corre en un hilo mientras se consume la siguiente: se solapa de verdad
+    con la lectura cuando esta usa el pool de procesos (trabajadores > 1).
+    Devuelve (df_maestro completo, df_final, estado), lo mismo que concatenar_maestro +
+    procesar_cruce_incremental. progress_callback solo se usa en la reconciliación final, que con
+    trabajadores > 1 se reparte en procesos como en procesar_cruce.
+    """
+    if config is None: config = obtener_snapshot_config()
+    base = df_maestro if df_maestro is not None else pd.DataFrame()
+    previos = []
+    vistas = set()
+    desde = 0
+    if estado is not None and _estado_vigente(estado, _hashes_filas(base), config):
+        previos = [(estado.resultados, estado.claves)]
+        vistas.update(estado.resultados.index)
+        desde = len(estado.claves)
+    
+    partes_maestro = [base]
+    futuros = []
+    desplazamiento = len(base)
+    ejecutor = ThreadPoolExecutor(max_workers=1)
+    try:
+        # Lo que quedó sin cruzar del maestro anterior va primero, como una parte más
+        pendiente = base.iloc[desde:]
+        if not pendiente.empty: futuros.append(ejecutor.submit(_cruzar_parte, pendiente, config, vistas))
+        for parte in partes:
+            if parte.empty: continue
+            # Índice global: las claves Nombre_<índice> tienen que ser las del maestro completo
+            parte = parte.set_axis(pd.RangeIndex(desplazamiento, desplazamiento + len(parte)))
+            desplazamiento += len(parte)
+            partes_maestro.append(parte)
+            futuros.append(ejecutor.submit(_cruzar_parte, parte, config, vistas))
+    except BaseException:
+        # Falló o se cortó la lectura: no se sigue cruzando lo que quedaba en espera
+        ejecutor.shutdown(wait=False, cancel_futures=True)
+        raise
+    
+    try:
+        cruzados = list(previos)
+        claves_repetidas = []
+        for futuro in futuros:
+            parcial, claves_parte, repetidas, metrica = futuro.result()
+            if metricas_callback: metricas_callback(metrica)
+            cruzados.append((parcial, claves_parte))
+            claves_repetidas.extend(repetidas)
+        ejecutor.shutdown()
+        df_maestro = concatenar_maestro(partes_maestro)
+        # Cada clave está una sola vez, en la parte donde apareció primero: orden de primera aparición
+        con_resultados = [r for r, _ in cruzados if not r.empty]
+        resultados = pd.concat(con_resultados) if con_resultados else pd.DataFrame(columns=COLUMNAS_SALIDA + ['Descartada'])
+        claves = pd.concat([c for _, c in cruzados]) if cruzados else pd.Series([], dtype=object)
+        
+        # Reconciliación: los clientes que aparecieron en más de una parte se cruzan con todas sus filas
+        # y quedan en el lugar de su primera aparición, igual que en el cruce del maestro completo
+        if claves_repetidas:
+            inicio = iniciar_medicion()
+            if progress_callback: progress_callback(90, "Reconciliando clientes repetidos entre archivos...")
+            filas = df_maestro[claves.isin(pd.unique(pd.Series(claves_repetidas, dtype=object))).to_numpy()]
+            reconciliado = _cruzar_por_clave(filas, config, trabajadores=trabajadores)
+            resultados = resultados.copy()
+            resultados.loc[reconciliado.index] = reconciliado
+            if metricas_callback: metricas_callback(medir_desde(inicio, "reconciliación", len(filas)))
+        
+        df_final = _final_desde_estado(resultados)
+        if unificar: df_final = unificar_clientes(df_final, progress_callback, metricas_callback)
+        if persistir:
+            if progress_callback: progress_callback(95, "Guardando la base unificada...")
+            guardar_base_unificada(df_final)
+        if progress_callback: progress_callback(100, "¡Cruce finalizado!")
+        return df_maestro, df_final, EstadoCruce(resultados, claves, config.version, _huella(_hashes_filas(df_maestro)))
+    except Exception as e:
+        raise RuntimeError(f"Falla en el motor de cruce: {str(e)}")
+
+def comparar_modos_cruce(df_maestro):
+    """Corre ambos motores sobre el mismo maestro y devuelve las filas que difieren (vacío = idénticos)."""
+    config = obtener_snapshot_config()
+    ref = procesar_cruce(df_maestro, modo=MODO_REFERENCIA, config=config).astype(object)
+    vec = procesar_cruce(df_maestro, modo=MODO_VECTORIZADO, config=config).astype(object)
+    if ref.shape != vec.shape or list(ref.columns) != list(vec.columns):
+        raise ValueError(f"Los motores devolvieron formas distintas: {ref.shape} vs {vec.shape}")
+    if ref.empty: return ref
+    distintas = (ref != vec).any(axis=1)
+    return pd.concat({MODO_REFERENCIA: ref[distintas], MODO_VECTORIZADO: vec[distintas]}, axis=1)
+
+# ==========================================
+# UNIFICACIÓN DE CLIENTES ENTRE ARCHIVOS
+# ==========================================
+# El cruce solo junta filas con el mismo Numero_Cliente; el mismo comercio cargado sin código en
+# varias planillas queda repetido. Acá se agrupan por bloques (teléfono canónico, comienzo del nombre)
+# y se unen con union-find: cada fila se compara solo con la primera de su bloque, nunca todos contra todos.
+LARGO_PREFIJO_NOMBRE = 5
+NOMBRE_VACIO = "Cliente Sin Nombre"
+NUMEROS_VACIOS = ["", "nan"]
+
+def normalizar_telefono_serie(telefonos):
+    """
+    Lleva teléfonos de solo dígitos a la forma nacional argentina de 10 dígitos (área + abonado):
+    saca el 54/0054 internacional, el 9 de celular, el 0 de larga distancia y el 15 después del área.
+    Lo que no encaja en esas reglas queda igual.
+    """
+    tel = _como_texto(telefonos)
+    # Todas las reglas sacan dígitos de más: los de 10 o menos (la gran mayoría) ya quedan como están
+    afuera = (tel.str.len() > 10).to_numpy()
+    if not afuera.any(): return tel
+    largos = tel[afuera]
+    largos = largos.str.replace(r'^(?:00)?54(?=\d{10,11}$)', '', regex=True)
+    largos = largos.str.replace(r'^9(?=\d{10}$)', '', regex=True)
+    largos = largos.str.replace(r'^0(?=\d{10,12}$)', '', regex=True)
+    # 12 dígitos = 10 nacionales con el 15 metido después del código de área (de 2 a 4 dígitos)
+    tel[afuera] = largos.str.replace(r'^(?=\d{12}$)(\d{2,4}?)15', r'\1', regex=True)
+    return tel
+
+def _prefijos_nombre(nombres):
+    # Minúsculas, sin tildes ni signos; se normaliza una vez por nombre distinto
+    codigos, unicos = pd.factorize(_como_texto(nombres))
+    prefijos = [re.sub(r'[^a-z0-9]', '', _normalizar_texto(u))[:LARGO_PREFIJO_NOMBRE] if u != NOMBRE_VACIO else "" for u in unicos]
+    return np.array(prefijos, dtype=object)[codigos]
+
+def _telefonos_largos(df_final):
+    # (fila, teléfono) de las 5 columnas, recorridas fila por fila y en el orden de las columnas
+    valores = df_final[COLUMNAS_TELEFONOS].to_numpy(dtype=object).ravel()
+    filas = np.repeat(np.arange(len(df_final)), len(COLUMNAS_TELEFONOS))
+    informados = pd.notna(valores)
+    informados[informados] = valores[informados] != ""
+    return filas[informados], valores[informados]
+
+def _buscar_raiz(padre, i):
+    while padre[i] != i:
+        padre[i] = padre[padre[i]] # compresión a la mitad del camino
+        i = padre[i]
+    return i
+
+def _unir_pares(padre, numeros, pares_a, pares_b):
+    # La raíz siempre es la fila de menor posición, así el representante es la primera aparición.
+    # Dos grupos con números de cliente distintos no se unen: el ERP ya dice que son clientes diferentes.
+    for a, b in zip(pares_a, pares_b):
+        ra, rb = _buscar_raiz(padre, a), _buscar_raiz(padre, b)
+        if ra == rb: continue
+        na, nb = numeros[ra], numeros[rb]
+        if na and nb and na != nb: continue
+        if rb < ra: ra, rb, na, nb = rb, ra, nb, na
+        padre[rb] = ra
+        if not na: numeros[ra] = nb
+
+def _inicios_de_tramo(ordenados):
+    # Para cada posición de un arreglo ordenado, dónde empieza el tramo de valores iguales
+    nuevo = np.ones(len(ordenados), dtype=bool)
+    nuevo[1:] = ordenados[1:] != ordenados[:-1]
+    return np.maximum.accumulate(np.where(nuevo, np.arange(len(ordenados)), 0))
+
+def _pares_por_bloque(bloques, filas):
+    # (primera fila del bloque, otra fila del mismo bloque), sin armar todos los pares posibles.
+    # filas viene ordenado, así que el orden estable deja primero a la menor de cada bloque.
+    orden = np.argsort(bloques, kind='stable')
+    filas_ordenadas = filas[orden]
+    primera = filas_ordenadas[_inicios_de_tramo(bloques[orden])]
+    otros = np.flatnonzero(primera != filas_ordenadas)
+    # Los pares se devuelven en el orden de los teléfonos: cada fila se une primero por su primer número
+    otros = otros[np.argsort(orden[otros], kind='stable')]
+    return primera[otros].tolist(), filas_ordenadas[otros].tolist()
+
+def _raices_finales(padre):
+    raiz = np.asarray(padre)
+    while True:
+        siguiente = raiz[raiz]
+        if np.array_equal(siguiente, raiz): return raiz
+        raiz = siguiente
+
+def _primero_informado(valores, vacios, grupos, representantes):
+    # Primer valor de cada grupo que no está en vacios; si ninguno, el del representante
+    valores = np.asarray(valores, dtype=object)
+    salida = valores[representantes].copy()
+    informadas = np.flatnonzero(~(pd.isna(valores) | pd.Series(valores, dtype=object).isin(vacios).to_numpy()))
+    con_dato, primeras = np.unique(grupos[informadas], return_index=True)
+    salida[con_dato] = valores[informadas[primeras]]
+    return salida
+
+def unificar_clientes(df_final, progress_callback=None, metricas_callback=None):
+    """
+    Junta los clientes repetidos entre archivos: misma forma canónica de teléfono y mismo comienzo
+    de nombre (o sin nombre, si el teléfono apunta a un único cliente con nombre). El resultado queda
+    en el orden de primera aparición, con el primer dato informado de cada campo y los teléfonos sin repetir.
+    """
+    if df_final.empty: return df_final
+    inicio = iniciar_medicion()
+    if progress_callback: progress_callback(96, "Buscando clientes repetidos entre archivos...")
+    df = df_final.reset_index(drop=True)
+    n = len(df)
+    filas, telefonos = _telefonos_largos(df)
+    canonicos, _ = pd.factorize(normalizar_telefono_serie(pd.Series(telefonos, dtype=object)))
+    codigos_prefijo, prefijos = pd.factorize(_prefijos_nombre(df['Nombre']))
+    # El cruce deja 'nan' en los clientes que vinieron sin código: cuenta como número vacío
+    numeros = [str(x).strip() for x in df['Número de cliente'].fillna("").to_numpy(dtype=object)]
+    numeros = ["" if x in NUMEROS_VACIOS else x for x in numeros]
+    padre = list(range(n))
+
+    # 1) Bloques (teléfono, prefijo del nombre); los sin nombre forman su propio bloque por teléfono
+    bloques = canonicos.astype(np.int64) * len(prefijos) + codigos_prefijo[filas]
+    _unir_pares(padre, numeros, *_pares_por_bloque(bloques, filas))
+
+    # 2) Un grupo sin nombre se suma al cliente con nombre que comparte su teléfono, si es uno solo
+    sin_nombre = (prefijos[codigos_prefijo] == "")[filas]
+    if sin_nombre.any() and (~sin_nombre).any():
+        raiz = _raices_finales(padre)
+        pares = np.unique(canonicos[~sin_nombre].astype(np.int64) * n + raiz[filas[~sin_nombre]])
+        tel_par, raiz_par = pares // n, pares % n
+        unico = np.bincount(tel_par, minlength=canonicos.max() + 1)[tel_par] == 1
+        destino = np.full(canonicos.max() + 1, -1, dtype=np.int64)
+        destino[tel_par[unico]] = raiz_par[unico]
+        candidatos = destino[canonicos[sin_nombre]]
+        grupo = raiz[filas[sin_nombre]][candidatos >= 0]
+        pares = np.unique(grupo * n + candidatos[candidatos >= 0])
+        grupo_par, destino_par = pares // n, pares % n
+        unico = np.bincount(grupo_par, minlength=n)[grupo_par] == 1
+        _unir_pares(padre, numeros, destino_par[unico].tolist(), grupo_par[unico].tolist())
+
+    raices = _raices_finales(padre)
+    representantes = np.flatnonzero(raices == np.arange(n))
+    if len(representantes) == n:
+        if metricas_callback: metricas_callback(medir_desde(inicio, "unificación", n))
+        return df_final
+
+    # 3) Un registro por grupo; grupos = número de grupo (0..k-1) en el orden de los representantes
+    if progress_callback: progress_callback(98, f"Unificando {n - len(representantes)} clientes repetidos...")
+    grupos = np.searchsorted(representantes, raices)
+    resultado = pd.DataFrame({
+        'Nombre': _primero_informado(df['Nombre'], [NOMBRE_VACIO, ""], grupos, representantes),
+        'Número de cliente': _primero_informado(df['Número de cliente'], NUMEROS_VACIOS, grupos, representantes),
+        'Zona del cliente': _primero_informado(df['Zona del cliente'], ["Desconocida", ""], grupos, representantes),
+        'Vendedor': _primero_informado(df['Vendedor'], ["0", ""], grupos, representantes),
+    }, dtype=object)
+    # Teléfonos del grupo en orden de aparición, sin repetir la forma canónica, hasta 5
+    orden = np.argsort(grupos[filas], kind='stable')
+    grupo_tel = grupos[filas][orden]
+    _, primeras = np.unique(grupo_tel * (canonicos.max() + 1) + canonicos[orden], return_index=True)
+    primeras.sort()
+    grupo_tel = grupo_tel[primeras]
+    posicion = np.arange(len(primeras)) - _inicios_de_tramo(grupo_tel)
+    entran = posicion < len(COLUMNAS_TELEFONOS)
+    tabla = np.full((len(representantes), len(COLUMNAS_TELEFONOS)), "", dtype=object)
+    tabla[grupo_tel[entran], posicion[entran]] = telefonos[orden][primeras][entran]
+    for pos, col in enumerate(COLUMNAS_TELEFONOS):
+        resultado[col] = pd.Series(tabla[:, pos], dtype=object)
+    if metricas_callback: metricas_callback(medir_desde(inicio, "unificación", n))
+    return resultado[COLUMNAS_SALIDA]
+
 def guardar_excel(df_final, ruta_guardar):
-    df_final.to_excel(ruta_guardar, index=False)
\ No newline at end of file
+    exportar_base(df_final, ruta_guardar, 'xlsx')
+
+def guardar_csv(df_final, ruta_guardar):
+    exportar_base(df_final, ruta_guardar, 'csv')
+
+# ==========================================
+# EXPORTACIÓN
+# ==========================================
+# Excel admite 1.048.576 filas por hoja contando el encabezado; lo que sobra sigue en otra hoja
+FILAS_POR_HOJA_XLSX = 1048575
+FILAS_POR_BLOQUE_EXPORTACION = 50000
+
+def _bloques_exportacion(df_final, filas_por_bloque):
+    for desde in range(0, len(df_final), filas_por_bloque):
+        yield desde, df_final.iloc[desde:desde + filas_por_bloque]
+
+def _exportar_xlsx(df_final, ruta, filas_por_bloque, avisar):
+    try:
+        import xlsxwriter
+    except ImportError:
+        avisar(0, "Escribiendo Excel (sin xlsxwriter, en un solo paso)...")
+        df_final.to_excel(ruta, index=False)
+        return
+    # constant_memory escribe cada fila al disco apenas se completa, así que la memoria no crece con la base.
+    # Sin conversión de textos a fórmulas/links: un '=' o un 'http' en el nombre se exporta tal cual.
+    libro = xlsxwriter.Workbook(ruta, {'constant_memory': True, 'strings_to_formulas': False, 'strings_to_urls': False})
+    try:
+        encabezado = libro.add_format({'bold': True})
+        columnas = [str(c) for c in df_final.columns]
+        hoja, fila_hoja = None, FILAS_POR_HOJA_XLSX
+        for desde, bloque in _bloques_exportacion(df_final, filas_por_bloque):
+            valores = bloque.astype(object).where(bloque.notna(), None).to_numpy()
+            for fila in valores:
+                if fila_hoja >= FILAS_POR_HOJA_XLSX:
+                    hoja = libro.add_worksheet(f"Sheet{len(libro.worksheets()) + 1}")
+                    hoja.write_row(0, 0, columnas, encabezado)
+                    fila_hoja = 0
+                fila_hoja += 1
+                hoja.write_row(fila_hoja, 0, fila)
+            avisar(desde + len(bloque), f"Escribiendo Excel: {desde + len(bloque)} filas...")
+        if hoja is None:
+            libro.add_worksheet("Sheet1").write_row(0, 0, columnas, encabezado)
+    finally:
+        libro.close()
+
+def _exportar_csv(df_final, ruta, filas_por_bloque, avisar):
+    # utf-8-sig para que Excel en Windows abra bien los acentos (el BOM se escribe una sola vez al abrir)
+    with open(ruta, 'w', encoding='utf-8-sig', newline='') as f:
+        pd.DataFrame(columns=df_final.columns).to_csv(f, index=False)
+        for desde, bloque in _bloques_exportacion(df_final, filas_por_bloque):
+            bloque.to_csv(f, index=False, header=False)
+            avisar(desde + len(bloque), f"Escribiendo CSV: {desde + len(bloque)} filas...")
+
+def _exportar_parquet(df_final, ruta, filas_por_bloque, avisar):
+    if pa is None:
+        raise RuntimeError("Para exportar a Parquet hace falta instalar pyarrow.")
+    import pyarrow.parquet as pq
+    # Todas las columnas de la base final son texto; el esquema se fija de entrada para que los bloques coincidan
+    esquema = pa.schema([(str(c), pa.string()) for c in df_final.columns])
+    # Un row group por bloque: el importador puede leerlo por partes sin cargar todo
+    with pq.ParquetWriter(ruta, esquema) as escritor:
+        for desde, bloque in _bloques_exportacion(df_final, filas_por_bloque):
+            escritor.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+            avisar(desde + len(bloque), f"Escribiendo Parquet: {desde + len(bloque)} filas...")
+
+FORMATOS_EXPORTACION = {
+    'xlsx': _exportar_xlsx,
+    'csv': _exportar_csv,
+    'parquet': _exportar_parquet,
+}
+
+def formato_por_extension(ruta, por_defecto='xlsx'):
+    extension = os.path.splitext(ruta)[1].lower().lstrip('.')
+    return extension if extension in FORMATOS_EXPORTACION else por_defecto
+
+def exportar_base(df_final, ruta, formato=None, progress_callback=None, filas_por_bloque=FILAS_POR_BLOQUE_EXPORTACION):
+    """
+    Escribe la base final por bloques en xlsx, csv o parquet (por defecto, según la extensión).
+    Avisa el avance a progress_callback(porcentaje, mensaje) y devuelve la Metrica de la exportación.
+    """
+    formato = formato or formato_por_extension(ruta)
+    if formato not in FORMATOS_EXPORTACION:
+        raise ValueError(f"Formato de exportación desconocido: {formato}")
+    total = len(df_final)
+
+    def avisar(filas_escritas, mensaje):
+        if progress_callback:
+            progress_callback(int(filas_escritas * 100 / total) if total else 100, mensaje)
+
+    inicio = iniciar_medicion()
+    FORMATOS_EXPORTACION[formato](df_final, ruta, filas_por_bloque, avisar)
+    if progress_callback: progress_callback(100, "Exportación terminada.")
+    return medir_desde(inicio, f"exportación {formato}", filas=total, archivos=1, archivo=os.path.basename(ruta))
+
+# ==========================================
+# EXPORTACIÓN POR VENDEDOR
+# ==========================================
+ARCHIVO_MANIFIESTO = "manifiesto.json"
+NOMBRE_SIN_VENDEDOR = "SinVendedor"
+
+def _nombre_seguro(texto):
+    # Lo que no sea letra, número, guion o punto pasa a '_' (los códigos traen '/' como en '302/1')
+    return re.sub(r'[^\w.-]+', '_', str(texto), flags=re.UNICODE).strip('_.') or NOMBRE_SIN_VENDEDOR
+
+def _telefono_vendedor(codigo, mapa_vendedores):
+    if codigo in mapa_vendedores: return mapa_vendedores[codigo]
+    # '302/1' usa el celular de '302' si no tiene uno propio
+    return mapa_vendedores.get(codigo.split('/')[0].strip(), "")
+
+def particionar_por_vendedor(df_final):
+    """Una sola pasada de groupby: {código de vendedor: posiciones de sus filas}, ordenado por código."""
+    if df_final.empty: return {}
+    vendedores = df_final['Vendedor']
+    claves = vendedores.where(vendedores.notna(), "").astype(str).str.strip()
+    return {codigo: posiciones for codigo, posiciones in sorted(claves.groupby(claves, sort=False).indices.items())}
+
+def _exportar_particion(df_particion, ruta, formato):
+    # Corre en el proceso que escribe, así el tiempo medido es el del archivo
+    return exportar_base(df_particion, ruta, formato)
+
+def exportar_por_vendedor(df_final, carpeta, formato='xlsx', trabajadores=1, progress_callback=None, metricas_callback=None):
+    """
+    Escribe un archivo por código de vendedor en carpeta (en paralelo con trabajadores > 1), nombrado
+    con el código y el celular de vendedores_config.json, y deja un manifiesto.json con filas y
+    tiempos de cada archivo. Devuelve el manifiesto.
+    """
+    if formato not in FORMATOS_EXPORTACION:
+        raise ValueError(f"Formato de exportación desconocido: {formato}")
+    os.makedirs(carpeta, exist_ok=True)
+    inicio = iniciar_medicion()
+    particiones = particionar_por_vendedor(df_final)
+    segundos_particion = time.perf_counter() - inicio.inicio
+    mapa_vendedores = obtener_snapshot_config().vendedores
+
+    tareas = []
+    nombres_usados = set()
+    for codigo, posiciones in particiones.items():
+        telefono = _telefono_vendedor(codigo, mapa_vendedores)
+        nombre = f"Vendedor_{_nombre_seguro(codigo) if codigo else NOMBRE_SIN_VENDEDOR}"
+        if telefono: nombre += f"_{_nombre_seguro(telefono)}"
+        # Dos códigos pueden quedar iguales al limpiarlos ('12/03' y '12_03')
+        base, n = nombre, 2
+        while nombre.lower() in nombres_usados:
+            nombre, n = f"{base}_{n}", n + 1
+        nombres_usados.add(nombre.lower())
+        tareas.append((codigo, telefono, os.path.join(carpeta, f"{nombre}.{formato}"), posiciones))
+
+    resultados = {}
+    def anotar(codigo, metrica):
+        resultados[codigo] = metrica
+        if metricas_callback: metricas_callback(metrica)
+        if progress_callback:
+            progress_callback(int(len(resultados) * 100 / len(tareas)), f"Vendedor {codigo or NOMBRE_SIN_VENDEDOR}: {metrica.filas} filas")
+
+    pool = ProcessPoolExecutor(max_workers=trabajadores, mp_context=_contexto_procesos()) if trabajadores > 1 and len(tareas) > 1 else None
+    try:
+        if pool is None:
+            for codigo, _, ruta, posiciones in tareas:
+                anotar(codigo, _exportar_particion(df_final.iloc[posiciones], ruta, formato))
+        else:
+            futuros = {pool.submit(_exportar_particion, df_final.iloc[posiciones], ruta, formato): codigo for codigo, _, ruta, posiciones in tareas}
+            for futuro in as_completed(futuros):
+                anotar(futuros[futuro], futuro.result())
+    finally:
+        if pool is not None: pool.shutdown(wait=False, cancel_futures=True)
+
+    total = medir_desde(inicio, f"exportación por vendedor {formato}", filas=len(df_final), archivos=len(tareas), archivo=carpeta)
+    if metricas_callback: metricas_callback(total)
+    manifiesto = {
+        'fecha': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'formato': formato,
+        'filas': len(df_final),
+        'trabajadores': trabajadores,
+        'segundos_particion': round(segundos_particion, 4),
+        'segundos_total': round(total.segundos, 4),
+        'archivos': [{
+            'vendedor': codigo, 'telefono': telefono, 'archivo': os.path.basename(ruta),
+            'filas': resultados[codigo].filas, 'segundos': round(resultados[codigo].segundos, 4),
+        } for codigo, telefono, ruta, _ in tareas],
+    }
+    with open(os.path.join(carpeta, ARCHIVO_MANIFIESTO), 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=4, ensure_ascii=False)
+    return manifiesto
+
+# ==========================================
+# ÍNDICES PARA BÚSQUEDA Y EDICIÓN
+# ==========================================
+# Se arman una vez sobre df_final (claves = posición de la fila) y se mantienen al editar:
+# número de cliente -> posiciones, y un índice invertido de teléfonos (solo dígitos) y palabras del nombre.
+# tokens_ordenados permite buscar por prefijo mientras se escribe.
+IndicesClientes = namedtuple('IndicesClientes', ['por_numero', 'por_token', 'tokens_ordenados'])
+
+_RE_PALABRAS = re.compile(r'\w+')
+_RE_NO_DIGITOS_TEL = re.compile(r'\D')
+
+def _normalizar_texto(texto):
+    # minúsculas y sin tildes: "Ñandú" -> "nandu"
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+def _tokens_fila(fila):
+    tokens = set(_RE_PALABRAS.findall(_normalizar_texto(fila['Nombre'])))
+    for col in COLUMNAS_TELEFONOS:
+        digitos = _RE_NO_DIGITOS_TEL.sub('', str(fila.get(col, '') or ''))
+        if digitos: tokens.add(digitos)
+    return tokens
+
+def _posiciones_por_valor(valores):
+    # (valor, posiciones donde aparece) para cada valor distinto, sin recorrer fila por fila
+    codigos, unicos = pd.factorize(valores)
+    orden = np.argsort(codigos, kind='stable')
+    cortes = np.flatnonzero(np.diff(codigos[orden])) + 1
+    return zip(unicos, np.split(orden, cortes)) if len(orden) else iter(())
+
+def construir_indices_clientes(df_final):
+    por_numero = defaultdict(set)
+    por_token = defaultdict(set)
+    if not df_final.empty:
+        # Se tokeniza cada valor distinto una sola vez (mismas reglas que _tokens_fila)
+        for numero, posiciones in _posiciones_por_valor(_como_texto(df_final['Número de cliente'])):
+            por_numero[numero].update(posiciones.tolist())
+        for nombre, posiciones in _posiciones_por_valor(_como_texto(df_final['Nombre'])):
+            for token in set(_RE_PALABRAS.findall(_normalizar_texto(nombre))):
+                por_token[token].update(posiciones.tolist())
+        for col in COLUMNAS_TELEFONOS:
+            digitos = _como_texto(df_final[col].fillna('')).str.replace(_RE_NO_DIGITOS_TEL, '', regex=True)
+            for telefono, posiciones in _posiciones_por_valor(digitos):
+                if telefono: por_token[telefono].update(posiciones.tolist())
+    return IndicesClientes(por_numero, por_token, sorted(por_token))
+
+def _quitar_de_indice(indice, clave, posicion, ordenados=None):
+    posiciones = indice.get(clave)
+    if posiciones is None: return
+    posiciones.discard(posicion)
+    if not posiciones:
+        del indice[clave]
+        if ordenados is not None:
+            i = bisect.bisect_left(ordenados, clave)
+            if i < len(ordenados) and ordenados[i] == clave: del ordenados[i]
+
+def actualizar_indices_cliente(indices, posicion, fila_vieja, fila_nueva):
+    """Mueve la fila 'posicion' de las claves de fila_vieja a las de fila_nueva (dicts con las columnas de salida)."""
+    numero_viejo, numero_nuevo = str(fila_vieja['Número de cliente']), str(fila_nueva['Número de cliente'])
+    if numero_viejo != numero_nuevo:
+        _quitar_de_indice(indices.por_numero, numero_viejo, posicion)
+        indices.por_numero[numero_nuevo].add(posicion)
+    
+    tokens_viejos, tokens_nuevos = _tokens_fila(fila_vieja), _tokens_fila(fila_nueva)
+    for token in tokens_viejos - tokens_nuevos:
+        _quitar_de_indice(indices.por_token, token, posicion, indices.tokens_ordenados)
+    for token in tokens_nuevos - tokens_viejos:
+        if token not in indices.por_token: bisect.insort(indices.tokens_ordenados, token)
+        indices.por_token[token].add(posicion)
+
+def buscar_clientes(indices, consulta):
+    """
+    Posiciones (ordenadas) de los clientes que cumplen todas las palabras de la consulta.
+    Cada palabra puede ser el comienzo de una palabra del nombre o de un teléfono, o un número de cliente exacto.
+    """
+    resultado = None
+    for palabra in _RE_PALABRAS.findall(_normalizar_texto(consulta)):
+        coincidencias = set(indices.por_numero.get(palabra, ()))
+        ordenados = indices.tokens_ordenados
+        i = bisect.bisect_left(ordenados, palabra)
+        while i < len(ordenados) and ordenados[i].startswith(palabra):
+            coincidencias |= indices.por_token[ordenados[i]]
+            i += 1
+        resultado = coincidencias if resultado is None else resultado & coincidencias
+        if not resultado: break
+    if resultado is None: return None # Consulta vacía: sin filtro
+    return np.array(sorted(resultado), dtype=np.int64)
+
+# ==========================================
+# BASE UNIFICADA EN SQLITE
+# ==========================================
+# El resultado del cruce puede quedar guardado en la misma base del historial, así otra sesión
+# lo abre, filtra y exporta sin volver a leer los reportes. Una sola base vigente: guardar reemplaza.
+COLUMNAS_BASE = ['nombre', 'numero_cliente', 'zona', 'vendedor', 'telefono_1', 'telefono_2', 'telefono_3', 'telefono_4', 'telefono_5']
+INDICES_BASE = [
+    'CREATE INDEX IF NOT EXISTS idx_clientes_numero ON clientes (numero_cliente)',
+    'CREATE INDEX IF NOT EXISTS idx_clientes_vendedor ON clientes (vendedor)',
+    'CREATE INDEX IF NOT EXISTS idx_telefonos_telefono ON telefonos_clientes (telefono)',
+]
+
+def _conectar_base_unificada():
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute('PRAGMA journal_mode=WAL') # Lecturas de la interfaz no se bloquean mientras se guarda
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY,
+            {", ".join(f"{col} TEXT" for col in COLUMNAS_BASE)}
+        )
+    ''')
+    # Cada teléfono en su fila, para buscar por número sin importar en qué columna quedó
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS telefonos_clientes (
+            cliente_id INTEGER,
+            orden INTEGER,
+            telefono TEXT
+        )
+    ''')
+    conn.execute('CREATE TABLE IF NOT EXISTS base_unificada_info (id INTEGER PRIMARY KEY CHECK (id = 1), fecha TEXT, registros INTEGER)')
+    for sentencia in INDICES_BASE: conn.execute(sentencia)
+    return conn
+
+def guardar_base_unificada(df_final):
+    """Reemplaza la base guardada por df_final, todo en una transacción."""
+    filas = [] if df_final.empty else list(df_final[COLUMNAS_SALIDA].astype(object).fillna("").itertuples(index=False, name=None))
+    telefonos = [(cliente_id, orden, tel) for cliente_id, fila in enumerate(filas)
+                 for orden, tel in enumerate(fila[4:], start=1) if tel]
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    conn = _conectar_base_unificada()
+    try:
+        with conn:
+            # Con muchos registros conviene cargar sin índices y armarlos una sola vez al final
+            for nombre_indice in ['idx_clientes_numero', 'idx_clientes_vendedor', 'idx_telefonos_telefono']:
+                conn.execute(f'DROP INDEX IF EXISTS {nombre_indice}')
+            conn.execute('DELETE FROM telefonos_clientes')
+            conn.execute('DELETE FROM clientes')
+            conn.executemany(f'INSERT INTO clientes (id, {", ".join(COLUMNAS_BASE)}) VALUES ({", ".join("?" * (len(COLUMNAS_BASE) + 1))})',
+                             ((cliente_id,) + fila for cliente_id, fila in enumerate(filas)))
+            conn.executemany('INSERT INTO telefonos_clientes (cliente_id, orden, telefono) VALUES (?, ?, ?)', telefonos)
+            for sentencia in INDICES_BASE: conn.execute(sentencia)
+            conn.execute('INSERT OR REPLACE INTO base_unificada_info (id, fecha, registros) VALUES (1, ?, ?)', (fecha, len(filas)))
+    finally:
+        conn.close()
+    return len(filas)
+
+def info_base_unificada():
+    """(fecha, registros) de la base guardada, o None si nunca se guardó una."""
+    conn = _conectar_base_unificada()
+    try:
+        return conn.execute('SELECT fecha, registros FROM base_unificada_info WHERE id = 1').fetchone()
+    finally:
+        conn.close()
+
+def consultar_base_unificada(numero_cliente=None, telefono=None, vendedor=None, nombre=None):
+    """
+    Devuelve la base guardada con las columnas de salida (igual que df_final), filtrada por los
+    criterios que se pasen. Número, teléfono y vendedor van por índice; nombre es una búsqueda parcial.
+    """
+    condiciones = []
+    parametros = []
+    if numero_cliente is not None:
+        condiciones.append('numero_cliente = ?'); parametros.append(str(numero_cliente))
+    if vendedor is not None:
+        condiciones.append('vendedor = ?'); parametros.append(str(vendedor))
+    if telefono is not None:
+        condiciones.append('id IN (SELECT cliente_id FROM telefonos_clientes WHERE telefono = ?)'); parametros.append(str(telefono))
+    if nombre is not None:
+        condiciones.append('nombre LIKE ?'); parametros.append(f"%{nombre}%")
+    where = f" WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    
+    conn = _conectar_base_unificada()
+    try:
+        df = pd.read_sql_query(f'SELECT {", ".join(COLUMNAS_BASE)} FROM clientes{where} ORDER BY id', conn, params=parametros)
+    finally:
+        conn.close()
+    if df.empty: return pd.DataFrame()
+    df.columns = COLUMNAS_SALIDA
+    return df
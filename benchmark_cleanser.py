@@ -0,0 +1,210 @@
+"""
+Benchmarks del motor de limpieza.
+
+Uso:
+    python benchmark_cleanser.py reglas_vendedor --filas 200000
+    python benchmark_cleanser.py matcher_zonas --filas 200000
+    python benchmark_cleanser.py etapas --filas 1000000 --archivos 4 --etiqueta "antes del cambio"
+    python benchmark_cleanser.py etapas --filas 1000000 --trabajadores 8 --sin-memoria
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+import backend_cleanser
+import generador_reportes
+
+ARCHIVO_RESULTADOS = "resultados_benchmark.csv"
+COLUMNAS_RESULTADOS = ['fecha', 'etiqueta', 'etapa', 'filas', 'segundos', 'filas_por_segundo', 'pico_memoria_mb']
+
+# Fragmentos típicos de las bolsas de texto de los reportes del ERP
+FRAGMENTOS_TEXTO = [
+    "FERRETERIA", "MADERERA", "CORRALON", "PINTURERIA", "DON JOSE", "EL ROBLE", "LOPEZ Y CIA",
+    "JORGE", "ROBERTO", "ALAN", "LUCAS", "NICO", "NICOLAS", "EZE", "LUIS", "EMMA", "VALENTÍN", "CARLOS",
+    "ZONA SUR", "ZONA NORTE", "QUILMES", "CORDOBA", "RUTA 2", "RUTA 29", "MAR DEL PLATA",
+    "101", "104", "137", "159", "302/1", "40/15", "cel:", "tel", "/", "|", "-", "Obs:",
+    "1145678901", "11 4567-8901", "15 5555 6666", "20-12345678-3", "12/03/2020",
+]
+VALORES_VENDEDOR = ["", "0", "18", "05", "5", "4", "44", "15", "302/1", "Vend 9", "JORGE", "0 12", "zz"]
+VALORES_ZONA = ["", "QUILMES", "ZONA SUR", "137", "cobr 3", "Lanús", "nan"]
+
+def generar_textos_vendedor(filas, semilla=0):
+    rnd = random.Random(semilla)
+    textos = [" | ".join(rnd.choice(FRAGMENTOS_TEXTO) for _ in range(rnd.randint(3, 14))) for _ in range(filas)]
+    vendedores = [rnd.choice(VALORES_VENDEDOR) for _ in range(filas)]
+    zonas = [rnd.choice(VALORES_ZONA) for _ in range(filas)]
+    return textos, vendedores, zonas
+
+def _cronometrar(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+def benchmark_reglas_vendedor(filas=200000, semilla=0):
+    """Compara la función original de vendedores contra las reglas compiladas (fila a fila y por columnas)."""
+    textos, vendedores, zonas = generar_textos_vendedor(filas, semilla)
+    vinculos = backend_cleanser.obtener_snapshot_config().vinculos
+    backend_cleanser.cargar_reglas_vendedor()
+
+    ref, t_ref = _cronometrar(lambda: [backend_cleanser.extraer_vendedor_referencia(t, v, z, vinculos) for t, v, z in zip(textos, vendedores, zonas)])
+    comp, t_comp = _cronometrar(lambda: [backend_cleanser.extraer_vendedor_inteligente(t, v, z, vinculos) for t, v, z in zip(textos, vendedores, zonas)])
+    serie, t_serie = _cronometrar(lambda: backend_cleanser.extraer_vendedor_serie(pd.Series(textos), pd.Series(vendedores), pd.Series(zonas), vinculos).tolist())
+
+    if ref != comp or ref != serie:
+        distintos = sum(1 for a, b, c in zip(ref, comp, serie) if not (a == b == c))
+        raise AssertionError(f"Las reglas compiladas difieren de la referencia en {distintos} filas")
+
+    resultados = {
+        'referencia': t_ref,
+        'compiladas (fila a fila)': t_comp,
+        'compiladas (columnar)': t_serie,
+    }
+    print(f"Atribución de vendedores sobre {filas} textos (resultados idénticos):")
+    for nombre, segundos in resultados.items():
+        print(f"  {nombre:<26} {segundos:8.3f} s  {filas / segundos:12,.0f} filas/s  x{t_ref / segundos:5.1f}")
+    return resultados
+
+def benchmark_matcher_zonas(filas=200000, semilla=0):
+    """Compara el recorrido original de MAPA_ZONAS contra el matcher precompilado (fila a fila y por columnas)."""
+    textos, _, zonas = generar_textos_vendedor(filas, semilla)
+    backend_cleanser.compilar_matcher_zonas()
+
+    ref, t_ref = _cronometrar(lambda: [backend_cleanser.extraer_zona_referencia(t, z) for t, z in zip(textos, zonas)])
+    comp, t_comp = _cronometrar(lambda: [backend_cleanser.extraer_zona_inteligente(t, z) for t, z in zip(textos, zonas)])
+    serie, t_serie = _cronometrar(lambda: backend_cleanser.extraer_zona_serie(pd.Series(textos), pd.Series(zonas)).tolist())
+
+    if ref != comp or ref != serie:
+        distintos = sum(1 for a, b, c in zip(ref, comp, serie) if not (a == b == c))
+        raise AssertionError(f"El matcher de zonas difiere de la referencia en {distintos} filas")
+
+    resultados = {
+        'referencia': t_ref,
+        'matcher (fila a fila)': t_comp,
+        'matcher (columnar)': t_serie,
+    }
+    print(f"Enriquecimiento de zonas sobre {filas} textos (resultados idénticos):")
+    for nombre, segundos in resultados.items():
+        print(f"  {nombre:<26} {segundos:8.3f} s  {filas / segundos:12,.0f} filas/s  x{t_ref / segundos:5.1f}")
+    return resultados
+
+def _medir(funcion, medir_memoria=True):
+    # El tiempo se toma en una pasada sin tracemalloc (que frena mucho el código Python) y el pico de
+    # memoria en una segunda pasada. tracemalloc no ve lo que reserva Arrow por fuera del allocator de Python.
+    resultado, segundos = _cronometrar(funcion)
+    pico_mb = None
+    if medir_memoria:
+        tracemalloc.start()
+        try:
+            funcion()
+            pico_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+    return resultado, segundos, pico_mb
+
+def _anotar_resultados(ruta_resultados, filas_resultado):
+    nuevo = not os.path.exists(ruta_resultados)
+    with open(ruta_resultados, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNAS_RESULTADOS)
+        if nuevo: writer.writeheader()
+        writer.writerows(filas_resultado)
+
+def benchmark_etapas(filas=200000, semilla=0, archivos=2, resultados=ARCHIVO_RESULTADOS, etiqueta="", medir_memoria=True, trabajadores=1):
+    """
+    Genera reportes sintéticos y cronometra cada etapa del motor por separado. Anota tiempo,
+    filas por segundo y pico de memoria en el archivo de resultados para comparar corridas.
+    """
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    filas_resultado = []
+    
+    def anotar(etapa, cantidad, segundos, pico_mb):
+        filas_resultado.append({
+            'fecha': fecha, 'etiqueta': etiqueta, 'etapa': etapa, 'filas': cantidad,
+            'segundos': round(segundos, 4), 'filas_por_segundo': round(cantidad / segundos) if segundos > 0 else '',
+            'pico_memoria_mb': round(pico_mb, 1) if pico_mb is not None else '',
+        })
+        memoria = f"{pico_mb:9.1f} MB" if pico_mb is not None else ""
+        print(f"  {etapa:<26} {segundos:8.3f} s  {cantidad / max(segundos, 1e-9):12,.0f} filas/s {memoria}")
+    
+    with tempfile.TemporaryDirectory() as carpeta:
+        print(f"Generando {filas} filas en {archivos} reportes...")
+        rutas = generador_reportes.generar_lote(carpeta, filas, archivos, "mixto", semilla)
+        print(f"Etapas del motor sobre {filas} filas sintéticas:")
+        
+        def detectar_encabezados():
+            for ruta in rutas:
+                if ruta.endswith('.csv'):
+                    sondas = [pd.read_csv(ruta, dtype=str, header=None, nrows=backend_cleanser.FILAS_SONDA_ENCABEZADO)]
+                else:
+                    sondas = pd.read_excel(ruta, sheet_name=None, dtype=str, header=None, nrows=backend_cleanser.FILAS_SONDA_ENCABEZADO).values()
+                for sonda in sondas:
+                    backend_cleanser.detectar_fila_encabezado(sonda)
+        _, segundos, pico = _medir(detectar_encabezados, medir_memoria)
+        anotar('detección de encabezado', backend_cleanser.FILAS_SONDA_ENCABEZADO * len(rutas), segundos, pico)
+        
+        leidos, segundos, pico = _medir(lambda: [backend_cleanser.procesar_un_archivo(r, usar_cache=False) for r in rutas], medir_memoria)
+        anotar('lectura y agrupación', sum(n for _, n in leidos), segundos, pico)
+        df_maestro = backend_cleanser.concatenar_maestro([df for df, _ in leidos])
+        
+        textos = backend_cleanser._como_texto(df_maestro['Row_String'])
+        _, segundos, pico = _medir(lambda: backend_cleanser.separar_telefonos_serie(textos), medir_memoria)
+        anotar('separar_telefonos', len(textos), segundos, pico)
+        
+        _, segundos, pico = _medir(lambda: backend_cleanser._agrupar_maestro(df_maestro), medir_memoria)
+        anotar('agrupación del maestro', len(df_maestro), segundos, pico)
+        
+        df_final, segundos, pico = _medir(lambda: backend_cleanser.procesar_cruce(df_maestro), medir_memoria)
+        anotar('cruce completo', len(df_maestro), segundos, pico)
+        
+        if trabajadores > 1:
+            # tracemalloc solo ve el proceso principal: el pico de los procesos no entra en la medición
+            df_paralelo, segundos, pico = _medir(lambda: backend_cleanser.procesar_cruce(df_maestro, trabajadores=trabajadores), medir_memoria)
+            if not df_paralelo.equals(df_final):
+                raise AssertionError("El cruce en paralelo difiere del cruce en un solo proceso")
+            anotar(f'cruce en {trabajadores} procesos', len(df_maestro), segundos, pico)
+        
+        _, segundos, pico = _medir(lambda: backend_cleanser.unificar_clientes(df_final), medir_memoria)
+        anotar('unificación de clientes', len(df_final), segundos, pico)
+        
+        # Referencia: el to_excel de pandas arma todo el libro en memoria antes de escribirlo
+        ruta_referencia = os.path.join(carpeta, "referencia.xlsx")
+        _, segundos, pico = _medir(lambda: df_final.to_excel(ruta_referencia, index=False), medir_memoria)
+        anotar('to_excel (referencia)', len(df_final), segundos, pico)
+        
+        for formato in backend_cleanser.FORMATOS_EXPORTACION:
+            ruta_salida = os.path.join(carpeta, f"salida.{formato}")
+            _, segundos, pico = _medir(lambda: backend_cleanser.exportar_base(df_final, ruta_salida, formato), medir_memoria)
+            anotar(f'exportar {formato}', len(df_final), segundos, pico)
+    
+    _anotar_resultados(resultados, filas_resultado)
+    print(f"Resultados agregados a {resultados}")
+    return filas_resultado
+
+BENCHMARKS = {
+    'reglas_vendedor': benchmark_reglas_vendedor,
+    'matcher_zonas': benchmark_matcher_zonas,
+    'etapas': benchmark_etapas,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks del compresor de base de datos")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS), help="Qué benchmark correr")
+    parser.add_argument("--filas", type=int, default=200000, help="Cantidad de filas sintéticas")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--archivos", type=int, default=2, help="Reportes a generar (solo 'etapas')")
+    parser.add_argument("--resultados", default=ARCHIVO_RESULTADOS, help="CSV donde se acumulan las corridas (solo 'etapas')")
+    parser.add_argument("--etiqueta", default="", help="Nombre de la corrida para compararla después (solo 'etapas')")
+    parser.add_argument("--trabajadores", type=int, default=1, help="Procesos para medir también el cruce en paralelo (solo 'etapas')")
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir el pico de memoria (evita la segunda pasada)")
+    args = parser.parse_args()
+    if args.benchmark == 'etapas':
+        benchmark_etapas(filas=args.filas, semilla=args.semilla, archivos=args.archivos, resultados=args.resultados,
+                         etiqueta=args.etiqueta, medir_memoria=not args.sin_memoria, trabajadores=args.trabajadores)
+    else:
+        BENCHMARKS[args.benchmark](filas=args.filas, semilla=args.semilla)
@@ -0,0 +1,145 @@
+"""
+Procesamiento por lotes sin interfaz gráfica, para correrlo programado en un servidor.
+
+Uso:
+    python cli_cleanser.py /datos/reportes /datos/extra/clientes_sur.xlsx --salida base_final.xlsx
+    python cli_cleanser.py /datos/reportes --salida base_final.csv --trabajadores 4 --tamano-bloque 50000
+    python cli_cleanser.py //servidor/reportes --salida base_final.xlsx --precarga-mb 512
+    python cli_cleanser.py /datos/reportes --salida base_final.xlsx --guardar-base
+    python cli_cleanser.py /datos/reportes --salida base_final.csv --trabajadores 4 --cruzar-al-leer
+    python cli_cleanser.py /datos/consolidado --salida base_final.parquet --limite-memoria-mb 1024
+    python cli_cleanser.py --desde-base --vendedor 18 --salida vendedor_18.csv
+    python cli_cleanser.py /datos/reportes --salida base_final.parquet
+    python cli_cleanser.py --desde-base --por-vendedor --salida /datos/vendedores --trabajadores 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import backend_cleanser
+
+FORMATOS_SALIDA = sorted(backend_cleanser.FORMATOS_EXPORTACION)
+
+def _exportar(df_final, ruta_salida, formato, por_vendedor, trabajadores):
+    # Devuelve las Metricas de la exportación; la última es la del total
+    if por_vendedor:
+        metricas = []
+        manifiesto = backend_cleanser.exportar_por_vendedor(df_final, ruta_salida, formato or 'xlsx', trabajadores, metricas_callback=metricas.append)
+        print(f"Exportados {len(manifiesto['archivos'])} archivos por vendedor a {ruta_salida} (ver {backend_cleanser.ARCHIVO_MANIFIESTO})")
+        return metricas
+    formato = formato or backend_cleanser.formato_por_extension(ruta_salida)
+    metrica = backend_cleanser.exportar_base(df_final, ruta_salida, formato)
+    print(f"Exportado a {ruta_salida} ({formato}, {metrica.filas / max(metrica.segundos, 1e-9):,.0f} filas/s)")
+    return [metrica]
+
+def ejecutar_lote(rutas, ruta_salida, formato=None, trabajadores=1, tamano_bloque=backend_cleanser.TAMANO_BLOQUE_CSV, guardar_base=False, por_vendedor=False, unificar=False, precarga_mb=backend_cleanser.BYTES_PRECARGA // (1024 * 1024), cruzar_al_leer=False, limite_memoria_mb=backend_cleanser.LIMITE_MAESTRO_MB):
+    """Lee, cruza y exporta. Devuelve el diccionario de tiempos por etapa (segundos)."""
+    tiempos = {}
+    backend_cleanser.inicializar_db()
+
+    # El escaneo de carpetas corre a la par de la lectura: su tiempo queda dentro del de lectura
+    inicio = time.perf_counter()
+    metricas = []
+    contadores = {'filas': 0, 'exitosos': 0, 'corruptos': 0}
+    
+    def partes_leidas():
+        rutas_encontradas = backend_cleanser.escanear_carpetas(rutas, metricas_callback=metricas.append)
+        for ruta, df_temp, filas in backend_cleanser.iterar_archivos_procesados(rutas_encontradas, trabajadores, tamano_bloque, metricas.append, precarga_mb * 1024 * 1024):
+            if not df_temp.empty:
+                contadores['filas'] += filas
+                contadores['exitosos'] += 1
+                print(f"  Leído: {os.path.basename(ruta)} ({filas} filas)")
+                yield df_temp
+            else:
+                contadores['corruptos'] += 1
+                print(f"  Sin datos útiles: {os.path.basename(ruta)}")
+    
+    if cruzar_al_leer:
+        # Cada archivo se cruza apenas se lee: el cruce queda dentro del tiempo de lectura
+        df_maestro, df_final, _ = backend_cleanser.cruzar_en_streaming(partes_leidas(), metricas_callback=metricas.append, persistir=guardar_base, unificar=unificar, trabajadores=trabajadores)
+        tiempos['lectura y cruce'] = time.perf_counter() - inicio
+    else:
+        # Si el maestro pasa limite_memoria_mb se derrama a Parquet y el cruce va partición por partición
+        df_maestro = backend_cleanser.acumular_maestro(partes_leidas(), limite_memoria_mb, metricas_callback=metricas.append)
+        tiempos['lectura'] = time.perf_counter() - inicio
+    filas_procesadas, archivos_exitosos, archivos_corruptos = contadores['filas'], contadores['exitosos'], contadores['corruptos']
+    escaneo = next(m for m in metricas if m.etapa == "escaneo")
+    print(f"Escaneo: {escaneo.archivos} archivos en {escaneo.archivo}, {escaneo.segundos:.2f} s")
+    if escaneo.archivos == 0:
+        raise SystemExit("No se encontraron archivos válidos.")
+
+    if not backend_cleanser.filas_maestro(df_maestro):
+        raise SystemExit("Ningún archivo aportó registros.")
+    historial_id = backend_cleanser.registrar_historial("Lote Procesado (CLI)", f"{archivos_exitosos} archivos", filas_procesadas)
+    if isinstance(df_maestro, backend_cleanser.MaestroEnDisco):
+        ubicacion = f"En disco: {df_maestro.lotes} lotes en {df_maestro.carpeta}"
+    else:
+        ubicacion = f"Memoria: {backend_cleanser.memoria_dataframe_mb(df_maestro):.1f} MB"
+    print(f"Filas cargadas: {filas_procesadas} de {archivos_exitosos} archivos ({archivos_corruptos} omitidos). {ubicacion}")
+
+    if not cruzar_al_leer:
+        inicio = time.perf_counter()
+        df_final = backend_cleanser.procesar_cruce(df_maestro, metricas_callback=metricas.append, persistir=guardar_base, unificar=unificar, trabajadores=trabajadores)
+        tiempos['cruce'] = time.perf_counter() - inicio
+    if isinstance(df_maestro, backend_cleanser.MaestroEnDisco): backend_cleanser.borrar_maestro_en_disco(df_maestro)
+    print(f"Registros únicos: {len(df_final)}")
+
+    metricas_exportacion = _exportar(df_final, ruta_salida, formato, por_vendedor, trabajadores)
+    tiempos['exportación'] = metricas_exportacion[-1].segundos
+    backend_cleanser.registrar_metricas(metricas + metricas_exportacion, historial_id)
+    return tiempos
+
+def exportar_desde_base(ruta_salida, formato=None, vendedor=None, por_vendedor=False, trabajadores=1):
+    """Exporta la base unificada guardada (opcionalmente de un solo vendedor) sin releer reportes."""
+    tiempos = {}
+    backend_cleanser.inicializar_db()
+    if backend_cleanser.info_base_unificada() is None:
+        raise SystemExit("No hay una base unificada guardada (usar --guardar-base en una corrida anterior).")
+
+    inicio = time.perf_counter()
+    df_final = backend_cleanser.consultar_base_unificada(vendedor=vendedor)
+    tiempos['consulta'] = time.perf_counter() - inicio
+    print(f"Registros: {len(df_final)}")
+
+    tiempos['exportación'] = _exportar(df_final, ruta_salida, formato, por_vendedor, trabajadores)[-1].segundos
+    return tiempos
+
+def imprimir_tiempos(tiempos):
+    print("Tiempos por etapa:")
+    for etapa, segundos in tiempos.items():
+        print(f"  {etapa:<16} {segundos:8.2f} s")
+    print(f"  {'total':<16} {sum(tiempos.values()):8.2f} s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compresor de base de datos por línea de comandos")
+    parser.add_argument("rutas", nargs="*", help="Archivos Excel/CSV o carpetas (se filtran por palabras clave)")
+    parser.add_argument("-o", "--salida", required=True, help="Archivo de salida (carpeta con --por-vendedor)")
+    parser.add_argument("--formato", choices=FORMATOS_SALIDA, help="Formato de salida (por defecto, según la extensión)")
+    parser.add_argument("--trabajadores", type=int, default=backend_cleanser.TRABAJADORES_INGESTA, help="Procesos en paralelo para leer, cruzar (y escribir con --por-vendedor)")
+    parser.add_argument("--tamano-bloque", type=int, default=backend_cleanser.TAMANO_BLOQUE_CSV, help="Filas por bloque al leer CSV")
+    parser.add_argument("--precarga-mb", type=int, default=backend_cleanser.BYTES_PRECARGA // (1024 * 1024), help="MB de reportes en memoria sin parsear todavía, contando los que se están parseando (0 = sin precarga)")
+    parser.add_argument("--limite-memoria-mb", type=int, default=backend_cleanser.LIMITE_MAESTRO_MB, help="Por encima de estos MB el maestro se guarda en Parquet en disco y se cruza por particiones")
+    parser.add_argument("--guardar-base", action="store_true", help="Dejar el resultado en la base unificada de SQLite")
+    parser.add_argument("--unificar", action="store_true", help="Juntar clientes repetidos entre archivos por teléfono y nombre")
+    parser.add_argument("--cruzar-al-leer", action="store_true", help="Cruzar cada archivo apenas se lee y reconciliar al final los clientes repetidos")
+    parser.add_argument("--desde-base", action="store_true", help="Exportar la base unificada guardada en vez de leer reportes")
+    parser.add_argument("--vendedor", help="Con --desde-base, exportar solo los clientes de este vendedor")
+    parser.add_argument("--por-vendedor", action="store_true", help="Un archivo por código de vendedor dentro de la carpeta --salida, con manifiesto")
+    args = parser.parse_args(argv)
+    if not args.rutas and not args.desde_base:
+        parser.error("hay que indicar archivos/carpetas o usar --desde-base")
+
+    try:
+        if args.desde_base:
+            tiempos = exportar_desde_base(args.salida, args.formato, args.vendedor, args.por_vendedor, args.trabajadores)
+        else:
+            tiempos = ejecutar_lote(args.rutas, args.salida, args.formato, args.trabajadores, args.tamano_bloque, args.guardar_base, args.por_vendedor, args.unificar, args.precarga_mb, args.cruzar_al_leer, args.limite_memoria_mb)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    imprimir_tiempos(tiempos)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
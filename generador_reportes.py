@@ -0,0 +1,118 @@
+"""
+Generador de reportes sintéticos con las mañas de los listados del ERP, para benchmarks.
+
+Cada reporte trae carátula antes del encabezado, líneas de 'ordenado por' y totales '-zzzz',
+clientes en varias líneas con el código vacío, teléfonos con separadores mezclados y
+códigos de zona metidos en el texto. Escala de 1k a 5M filas (los Excel se parten en hojas).
+
+Uso:
+    python generador_reportes.py carpeta_salida --filas 100000 --archivos 4 --formato mixto
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Excel admite 1.048.576 filas por hoja; se deja lugar para la carátula y el encabezado
+FILAS_POR_HOJA_EXCEL = 1000000
+
+ENCABEZADO = ["Cód.", "Nombre", "Teléfonos", "Vendedor", "Zona", "Observaciones"]
+CARATULA = [
+    ["WOOD TOOLS S.A.", "", "", "", "", ""],
+    ["Clientes habilitados", "ordenado por zona", "", "", "", ""],
+    ["Fecha: 01/03/2024", "Hoja: 1", "", "", "", ""],
+]
+
+NOMBRES = ["FERRETERIA", "MADERERA", "CORRALON", "PINTURERIA", "BAZAR", "CARPINTERIA", "DON JOSE",
+           "EL ROBLE", "LOPEZ Y CIA", "Fernandez", "Ñandú SRL", "HERRAJES DEL SUR", "nan", ""]
+VENDEDORES = ["18", "05", "5", "4", "44", "16", "40", "15", "09", "03", "1", "0", "302/1", "40/15",
+              "JORGE", "ALAN", "Vend 9", ""]
+ZONAS = ["QUILMES", "ZONA SUR", "ZONA NORTE", "RUTA 29", "RUTA 2", "CORDOBA", "137", "104 LOMAS",
+         "Lanús", "RUTA 5 Y 7", "MAR DEL PLATA", "cobr 18", "SUR II", "LA PLATA", "159", ""]
+OBSERVACIONES = ["", "", "", "Entregar por 137", "ver con ROBERTO", "cobr. 302/1", "zona 104 lomas",
+                 "NICO lleva pedido", "x ruta 29", "Obs: cerrado lunes"]
+FORMATOS_TELEFONO = ["{a}", "{a} / {b}", "cel: {a}; tel {b}", "{a}*{b}", "000{a}", "{a}_{b},{a}",
+                     "11 {c}-{d}", "15 {c} {d}", "+54 9 11 {c} {d}", "12/03/2020 {a}", "20-{c}{d}-3", ""]
+FILAS_BASURA = [
+    ["Ordenado por zona", "", "", "", "", ""],
+    ["Total zona", "-zzzz", "", "", "", ""],
+    ["-999", "Subtotal", "", "", "", ""],
+    ["Z.Fiscal: Responsable Inscripto", "", "", "", "", ""],
+]
+
+def _telefonos(rng, n):
+    a = rng.integers(1100000000, 1199999999, n)
+    b = rng.integers(2200000000, 2299999999, n)
+    c = rng.integers(1000, 9999, n)
+    d = rng.integers(1000, 9999, n)
+    formatos = rng.choice(len(FORMATOS_TELEFONO), n)
+    return [FORMATOS_TELEFONO[f].format(a=x, b=y, c=z, d=w) for f, x, y, z, w in zip(formatos, a, b, c, d)]
+
+def generar_filas(filas, semilla=0):
+    """Arma el cuerpo del reporte (sin carátula ni encabezado) como DataFrame de texto con celdas vacías en NaN."""
+    rng = np.random.default_rng(semilla)
+    # 0 = primera línea de un cliente, 1 = línea de continuación (código vacío), 2 = basura del ERP
+    tipo = rng.choice(3, filas, p=[0.62, 0.34, 0.04])
+    tipo[0] = 0
+    inicio = tipo == 0
+    continuacion = tipo == 1
+
+    # Códigos correlativos, con un 5% de clientes que reaparecen más adelante en el listado
+    codigos = np.cumsum(inicio).astype(np.int64)
+    repetidos = inicio & (rng.random(filas) < 0.05)
+    codigos[repetidos] = rng.integers(1, np.maximum(codigos[repetidos], 2))
+
+    nombres = np.char.add(np.char.add(rng.choice(NOMBRES, filas), " "), rng.integers(1, 500, filas).astype(str))
+    df = pd.DataFrame({
+        ENCABEZADO[0]: np.where(inicio, codigos.astype(str), ""),
+        ENCABEZADO[1]: np.where(inicio, nombres, ""),
+        ENCABEZADO[2]: _telefonos(rng, filas),
+        ENCABEZADO[3]: np.where(inicio, rng.choice(VENDEDORES, filas), ""),
+        ENCABEZADO[4]: rng.choice(ZONAS, filas),
+        ENCABEZADO[5]: rng.choice(OBSERVACIONES, filas),
+    }, dtype=object)
+
+    basura = np.flatnonzero(tipo == 2)
+    if len(basura):
+        df.iloc[basura] = np.array(FILAS_BASURA, dtype=object)[rng.choice(len(FILAS_BASURA), len(basura))]
+    df.loc[continuacion, ENCABEZADO[4]] = np.where(rng.random(continuacion.sum()) < 0.5, "", df.loc[continuacion, ENCABEZADO[4]])
+    return df.replace("", np.nan)
+
+def _con_caratula(cuerpo):
+    cabecera = pd.DataFrame(CARATULA + [ENCABEZADO], columns=ENCABEZADO).replace("", np.nan)
+    return pd.concat([cabecera, cuerpo], ignore_index=True)
+
+def generar_reporte(ruta, filas, semilla=0):
+    """Escribe un reporte .xlsx o .csv (según la extensión) con 'filas' líneas de datos."""
+    cuerpo = generar_filas(filas, semilla)
+    if ruta.endswith('.csv'):
+        _con_caratula(cuerpo).to_csv(ruta, index=False, header=False)
+        return ruta
+    with pd.ExcelWriter(ruta) as writer:
+        for n_hoja, desde in enumerate(range(0, max(filas, 1), FILAS_POR_HOJA_EXCEL), start=1):
+            parte = cuerpo.iloc[desde:desde + FILAS_POR_HOJA_EXCEL]
+            _con_caratula(parte).to_excel(writer, sheet_name=f"Hoja{n_hoja}", index=False, header=False)
+    return ruta
+
+def generar_lote(carpeta, filas, archivos=1, formato="mixto", semilla=0):
+    """Reparte 'filas' entre 'archivos' reportes dentro de carpeta; devuelve las rutas creadas."""
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = []
+    for i in range(archivos):
+        extension = formato if formato != "mixto" else ("xlsx" if i % 2 == 0 else "csv")
+        filas_archivo = filas // archivos + (1 if i < filas % archivos else 0)
+        ruta = os.path.join(carpeta, f"clientes_sintetico_{i + 1}.{extension}")
+        rutas.append(generar_reporte(ruta, filas_archivo, semilla + i))
+    return rutas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera reportes de clientes sintéticos para benchmarks")
+    parser.add_argument("carpeta", help="Carpeta de salida")
+    parser.add_argument("--filas", type=int, default=100000, help="Filas de datos en total (1k a 5M)")
+    parser.add_argument("--archivos", type=int, default=1)
+    parser.add_argument("--formato", choices=["xlsx", "csv", "mixto"], default="mixto")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+    for ruta in generar_lote(args.carpeta, args.filas, args.archivos, args.formato, args.semilla):
+        print(ruta)
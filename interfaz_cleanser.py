@@ -4,6 +4,7 @@ import os
 import sys
 import time
 import threading
+import multiprocessing
 import pandas as pd
 from datetime import datetime
 from PIL import Image, ImageTk
@@ -33,6 +34,7 @@ class DataCleanserApp:
         backend_cleanser.inicializar_db()
         self.df_maestro = pd.DataFrame()
         self.df_final = pd.DataFrame()
+        self.estado_cruce = None # Lo que ya se cruzó del maestro; los archivos nuevos solo recalculan sus clientes
         
         self.cola_rutas = []
         self.hilo_activo = False
@@ -60,6 +62,7 @@ class DataCleanserApp:
         tk.Button(frame_botones, text="🧹 2. Forzar Cruce Manual", command=self.iniciar_cruce_fondo, bg="#2196F3", fg="white", font=("bold", 10)).pack(side=tk.LEFT, padx=30)
         
         tk.Button(frame_botones, text="📥 3. EXPORTAR BASE FINAL", command=self.exportar_excel, bg="#E91E63", fg="white", font=("bold", 10)).pack(side=tk.RIGHT, padx=5)
+        tk.Button(frame_botones, text="👥 Exportar por Vendedor", command=self.exportar_por_vendedor, bg="#AD1457", fg="white", font=("bold", 10)).pack(side=tk.RIGHT, padx=5)
         
         # --- NUEVO BOTON PARA VINCULAR ZONAS ---
         tk.Button(frame_botones, text="🗺️ Vincular Zonas", command=self.abrir_config_zonas, bg="#9C27B0", fg="white", font=("bold", 10)).pack(side=tk.RIGHT, padx=5)
@@ -96,7 +99,32 @@ class DataCleanserApp:
         self.btn_iniciar = tk.Button(frame_proceso_accion, text="▶ INICIAR LECTURA", command=self.iniciar_procesamiento_fondo, bg="#4CAF50", fg="white", font=("Segoe UI", 12, "bold"), width=30)
         self.btn_iniciar.pack(pady=10)
         
+        frame_trabajadores = tk.Frame(frame_proceso_accion, bg="#f5f5f5")
+        frame_trabajadores.pack()
+        tk.Label(frame_trabajadores, text="Procesos en paralelo para leer y cruzar (1 = en serie):", bg="#f5f5f5", font=("Arial", 9)).pack(side="left")
+        self.var_trabajadores = tk.IntVar(value=backend_cleanser.TRABAJADORES_INGESTA)
+        tk.Spinbox(frame_trabajadores, from_=1, to=max(1, os.cpu_count() or 1), textvariable=self.var_trabajadores, width=4).pack(side="left", padx=5)
+        self.var_cruzar_al_leer = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame_trabajadores, text="Cruzar mientras se lee", variable=self.var_cruzar_al_leer, bg="#f5f5f5").pack(side="left", padx=10)
+        
+        frame_limite = tk.Frame(frame_proceso_accion, bg="#f5f5f5")
+        frame_limite.pack(pady=(5, 0))
+        tk.Label(frame_limite, text="Pasar el maestro a disco por encima de (MB):", bg="#f5f5f5", font=("Arial", 9)).pack(side="left")
+        self.var_limite_maestro = tk.IntVar(value=backend_cleanser.LIMITE_MAESTRO_MB)
+        tk.Spinbox(frame_limite, from_=64, to=65536, increment=256, textvariable=self.var_limite_maestro, width=7).pack(side="left", padx=5)
+        
         # PESTAÑA BASE DE DATOS
+        frame_busqueda = tk.Frame(self.tab_datos)
+        frame_busqueda.pack(fill="x", padx=10, pady=(10, 0))
+        tk.Label(frame_busqueda, text="🔎 Buscar (nombre, teléfono o nro de cliente):", font=("Arial", 10)).pack(side="left")
+        self.var_busqueda = tk.StringVar()
+        ent_busqueda = tk.Entry(frame_busqueda, textvariable=self.var_busqueda, width=40)
+        ent_busqueda.pack(side="left", padx=5)
+        ent_busqueda.bind("<KeyRelease>", lambda e: self._programar_busqueda())
+        self.lbl_busqueda = tk.Label(frame_busqueda, text="", fg="gray")
+        self.lbl_busqueda.pack(side="left", padx=10)
+        self.busqueda_pendiente = None
+        
         frame_tabla = tk.Frame(self.tab_datos)
         frame_tabla.pack(fill="both", expand=True, padx=10, pady=10)
         
@@ -107,15 +135,32 @@ class DataCleanserApp:
         self.tree.heading("Vend", text="Código Vendedor"); self.tree.column("Vend", width=120)
         self.tree.heading("InfoExtra", text="Data Extraída"); self.tree.column("InfoExtra", width=300)
         
-        scroll = ttk.Scrollbar(frame_tabla, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscroll=scroll.set)
-        scroll.pack(side="right", fill="y")
+        # Grilla virtual: el Treeview solo tiene las filas que entran en pantalla y la barra
+        # recorre el DataFrame completo; al desplazarse se reescriben esas mismas filas.
+        self.scroll_grilla = ttk.Scrollbar(frame_tabla, orient="vertical", command=self._desplazar_grilla)
+        self.scroll_grilla.pack(side="right", fill="y")
         self.tree.pack(side="left", fill="both", expand=True)
+        self.grilla_inicio = 0
+        self.grilla_pintada_desde = 0
+        self.grilla_cruzada = False
+        self.grilla_posiciones = None # Con una búsqueda activa: posiciones de df_final que se muestran
+        self.indices_clientes = None
+        self.tree.bind("<Configure>", lambda e: self._pintar_grilla())
+        self.tree.bind("<MouseWheel>", lambda e: self._mover_grilla(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self._mover_grilla(-3))
+        self.tree.bind("<Button-5>", lambda e: self._mover_grilla(3))
+        self.tree.bind("<Prior>", lambda e: self._mover_grilla(-self._filas_visibles()))
+        self.tree.bind("<Next>", lambda e: self._mover_grilla(self._filas_visibles()))
         
         frame_edicion = tk.Frame(self.tab_datos, pady=5)
         frame_edicion.pack(fill="x", side="bottom")
         tk.Button(frame_edicion, text="✏️ Editar Fila Seleccionada", command=self.editar_cliente_ui, bg="#009688", fg="white", font=("Arial", 10, "bold")).pack(side="right", padx=20)
         tk.Label(frame_edicion, text="Hacé clic en un cliente de arriba y presioná el botón para corregir su vendedor a mano.", fg="gray").pack(side="right", padx=10)
+        self.var_persistir = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame_edicion, text="Guardar la base unificada en disco al cruzar", variable=self.var_persistir).pack(side="left", padx=10)
+        self.var_unificar = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame_edicion, text="Unificar clientes repetidos entre archivos (por teléfono)", variable=self.var_unificar).pack(side="left", padx=10)
+        tk.Button(frame_edicion, text="🗄️ Abrir Base Guardada", command=self.abrir_base_guardada, bg="#795548", fg="white").pack(side="left", padx=5)
         
         # PESTAÑA HISTORIAL
         self.tree_hist = ttk.Treeview(self.tab_historial, columns=("ID", "Fec", "Tipo", "Ruta", "Regs"), show="headings")
@@ -126,6 +171,18 @@ class DataCleanserApp:
         self.tree_hist.heading("Regs", text="Registros Extraídos"); self.tree_hist.column("Regs", width=150)
         self.tree_hist.pack(fill="both", expand=True)
         
+        tk.Label(self.tab_historial, text="Rendimiento por etapa y por archivo (en rojo, los archivos más lentos):", font=("Arial", 10, "bold")).pack(anchor="w", padx=10, pady=(10, 0))
+        self.tree_metricas = ttk.Treeview(self.tab_historial, columns=("Fec", "Etapa", "Arch", "Seg", "FilasSeg", "ArchSeg", "RSS"), show="headings")
+        self.tree_metricas.heading("Fec", text="Fecha"); self.tree_metricas.column("Fec", width=140)
+        self.tree_metricas.heading("Etapa", text="Etapa"); self.tree_metricas.column("Etapa", width=110)
+        self.tree_metricas.heading("Arch", text="Archivo"); self.tree_metricas.column("Arch", width=260)
+        self.tree_metricas.heading("Seg", text="Segundos"); self.tree_metricas.column("Seg", width=80)
+        self.tree_metricas.heading("FilasSeg", text="Filas/s"); self.tree_metricas.column("FilasSeg", width=90)
+        self.tree_metricas.heading("ArchSeg", text="Archivos/s"); self.tree_metricas.column("ArchSeg", width=80)
+        self.tree_metricas.heading("RSS", text="Pico RAM de la etapa (+MB)"); self.tree_metricas.column("RSS", width=160)
+        self.tree_metricas.tag_configure("lento", background="#ffcdd2")
+        self.tree_metricas.pack(fill="both", expand=True)
+        
         self.lbl_estado_principal = tk.Label(root, text="Esperando instrucciones...", fg="gray", font=("Arial", 10, "bold"))
         self.lbl_estado_principal.pack(side="bottom", pady=5)
         self.actualizar_tabla_historial()
@@ -234,7 +291,8 @@ class DataCleanserApp:
     # EDICIÓN INDIVIDUAL DE UN CLIENTE
     # ==========================================
     def editar_cliente_ui(self):
-        if self.df_final.empty:
+        # Las posiciones de la grilla solo son de df_final cuando muestra la base cruzada
+        if self.df_final.empty or not self.grilla_cruzada:
             return messagebox.showwarning("Atención", "Primero debes presionar 'Cruzar Datos' (Paso 2) para poder editar a los clientes finales.")
             
         seleccion = self.tree.selection()
@@ -243,6 +301,10 @@ class DataCleanserApp:
             
         item_id = seleccion[0]
         valores = self.tree.item(item_id, "values")
+        posicion = self._posicion_en_df(item_id)
+        if not 0 <= posicion < len(self.df_final):
+            return messagebox.showwarning("Atención", "La tabla cambió: volvé a seleccionar el cliente.")
+        df_editado = self.df_final
         
         vent_edit = tk.Toplevel(self.root)
         vent_edit.title("Editar Cliente Específico")
@@ -264,24 +326,24 @@ class DataCleanserApp:
             
         def guardar_edicion():
             nuevos_val = [e.get().strip() for e in entradas]
+            # Un cruce o una lectura pudo reemplazar df_final mientras la ventana estaba abierta
+            if not self.grilla_cruzada or self.df_final is not df_editado:
+                vent_edit.destroy()
+                return messagebox.showwarning("Atención", "La tabla cambió mientras se editaba: volvé a seleccionar el cliente.", parent=self.root)
             self.tree.item(item_id, values=nuevos_val)
             
-            nro_original = valores[1]
-            idx_list = self.df_final.index[self.df_final['Número de cliente'] == nro_original].tolist()
+            # La fila se ubica por su posición en la grilla: sin recorrer la columna de números
+            fila_vieja = dict(zip(backend_cleanser.COLUMNAS_SALIDA, self.df_final.iloc[posicion].tolist()))
+            tels = [t.strip() for t in nuevos_val[4].split('|') if t.strip()]
+            fila_nueva = dict(fila_vieja)
+            fila_nueva.update({'Nombre': nuevos_val[0], 'Número de cliente': nuevos_val[1], 'Zona del cliente': nuevos_val[2], 'Vendedor': nuevos_val[3]})
+            for i, col in enumerate(backend_cleanser.COLUMNAS_TELEFONOS):
+                fila_nueva[col] = tels[i] if len(tels) > i else ""
             
-            if idx_list:
-                idx = idx_list[0]
-                self.df_final.at[idx, 'Nombre'] = nuevos_val[0]
-                self.df_final.at[idx, 'Número de cliente'] = nuevos_val[1]
-                self.df_final.at[idx, 'Zona del cliente'] = nuevos_val[2]
-                self.df_final.at[idx, 'Vendedor'] = nuevos_val[3] 
-                
-                tels = [t.strip() for t in nuevos_val[4].split('|') if t.strip()]
-                self.df_final.at[idx, 'Primer número'] = tels[0] if len(tels) > 0 else ""
-                self.df_final.at[idx, 'Segundo número'] = tels[1] if len(tels) > 1 else ""
-                self.df_final.at[idx, 'Tercer número'] = tels[2] if len(tels) > 2 else ""
-                self.df_final.at[idx, 'Cuarto número'] = tels[3] if len(tels) > 3 else ""
-                self.df_final.at[idx, 'Quinto número'] = tels[4] if len(tels) > 4 else ""
+            for col, valor in fila_nueva.items():
+                self.df_final.iat[posicion, self.df_final.columns.get_loc(col)] = valor
+            if self.indices_clientes is not None:
+                backend_cleanser.actualizar_indices_cliente(self.indices_clientes, posicion, fila_vieja, fila_nueva)
                 
             vent_edit.destroy()
             messagebox.showinfo("Guardado", f"El cliente {nuevos_val[0]} fue actualizado con éxito.\nSe guardó con el código de vendedor: {nuevos_val[3]}.", parent=self.root)
@@ -363,6 +425,17 @@ class DataCleanserApp:
     def iniciar_procesamiento_fondo(self):
         if not self.cola_rutas: return
         if self.hilo_activo: return
+        try:
+            self.trabajadores_ingesta = max(1, int(self.var_trabajadores.get()))
+        except (tk.TclError, ValueError):
+            self.trabajadores_ingesta = 1
+        try:
+            self.limite_maestro_mb = max(1, int(self.var_limite_maestro.get()))
+        except (tk.TclError, ValueError):
+            self.limite_maestro_mb = backend_cleanser.LIMITE_MAESTRO_MB
+        self.cruzar_al_leer = self.var_cruzar_al_leer.get()
+        self.persistir_cruce = self.var_persistir.get()
+        self.unificar_cruce = self.var_unificar.get()
         self.hilo_activo = True
         self.pausado = False
         self.cancelado = False
@@ -390,15 +463,21 @@ class DataCleanserApp:
             self.btn_pausa.config(state="disabled")
             self.btn_cancelar.config(state="disabled")
 
+    # Durante la lectura la cola cambia de a un archivo: se toca solo esa línea de la lista, sin redibujarla
+    def _agregar_a_cola(self, ruta):
+        self.cola_rutas.append(ruta)
+        self.listbox_cola.insert(tk.END, os.path.basename(ruta))
+
     def _quitar_primero_y_refrescar(self):
         if self.cola_rutas:
             self.cola_rutas.pop(0)
-            self.refrescar_listbox_cola()
+            self.listbox_cola.delete(0)
 
     def _trabajador_procesamiento(self):
         filas_procesadas = 0
         archivos_exitosos = 0
         archivos_corruptos = 0
+        cruzado = False
         
         def finalizar_ui(error_msg=None):
             self.hilo_activo = False
@@ -407,7 +486,7 @@ class DataCleanserApp:
                 self.vent_progreso.destroy()
                 
             self.actualizar_tabla_historial()
-            self.actualizar_tabla_datos(cruza_finalizada=False)
+            self.actualizar_tabla_datos(cruza_finalizada=cruzado)
             
             if error_msg:
                 self.lbl_estado_principal.config(text="ERROR FATAL.", fg="red")
@@ -416,77 +495,92 @@ class DataCleanserApp:
                 self.lbl_estado_principal.config(text="PROCESO CANCELADO.", fg="red")
             
             # --- AUTO-CRUCE: Acá está la magia para que cruce solo después de cargar ---
-            if not self.cancelado and not error_msg and not self.df_maestro.empty:
+            if not self.cancelado and not error_msg and not cruzado and backend_cleanser.filas_maestro(self.df_maestro):
                 self.root.after(500, self.iniciar_cruce_fondo)
                 
         try:
             self.root.after(0, lambda: self.lbl_archivo_actual.config(text="Escaneando carpetas...", fg="blue"))
-            rutas_expandidas = []
-            PALABRAS_CLAVE = ['contacto', 'cliente', 'maestro', 'base', 'padron', 'datos', 'zona', 'giras', 'rutas']
-            
-            for ruta in self.cola_rutas:
-                if os.path.isdir(ruta):
-                    for raiz, directorios, archivos in os.walk(ruta):
-                        for arch in archivos:
-                            nombre_low = arch.lower()
-                            if arch.endswith(('.xlsx', '.xls', '.csv')) and not arch.startswith('~$'):
-                                if any(palabra in nombre_low for palabra in PALABRAS_CLAVE):
-                                    rutas_expandidas.append(os.path.join(raiz, arch))
-                else:
-                    rutas_expandidas.append(ruta)
-                    
-            self.cola_rutas = rutas_expandidas
+            # Las carpetas se escanean mientras se leen los reportes: la cola pasa a mostrar los archivos
+            # a medida que aparecen y cada uno se empieza a leer sin esperar a que termine el escaneo
+            rutas_cola = list(self.cola_rutas)
+            self.cola_rutas = []
             self.root.after(0, self.refrescar_listbox_cola)
             
-            if not self.cola_rutas:
-                self.root.after(0, lambda: messagebox.showinfo("Filtro", "No se encontraron archivos válidos.", parent=self.vent_progreso))
-                self.cancelado = True
-            
-            df_acumulado = []
-            rutas_pendientes = list(self.cola_rutas)
-            total_archivos = len(rutas_pendientes)
+            maestro = self.df_maestro
+            archivos_encontrados = 0
             archivos_procesados = 0
+            metricas = []
             
-            for ruta_actual in rutas_pendientes:
-                if self.cancelado: break
-                while self.pausado:
-                    time.sleep(0.5)
-                    if self.cancelado: break
-                if self.cancelado: break
-                
-                porcentaje = int((archivos_procesados / total_archivos) * 98) if total_archivos > 0 else 98
-                nombre_arch = os.path.basename(ruta_actual)
-                
-                self.root.after(0, lambda p=porcentaje: self.var_progreso.set(p))
-                self.root.after(0, lambda p=porcentaje: self.lbl_porcentaje.config(text=f"{p}%"))
-                self.root.after(0, lambda n=nombre_arch: self.lbl_archivo_actual.config(text=f"Leyendo: {n}...", fg="blue"))
-                
-                df_temp, filas = backend_cleanser.procesar_un_archivo(ruta_actual)
-                
-                if not df_temp.empty:
-                    df_acumulado.append(df_temp)
-                    filas_procesadas += filas
-                    archivos_exitosos += 1
-                    self.root.after(0, lambda f=filas_procesadas: self.lbl_filas_memoria.config(text=f"Filas cargadas: {f}"))
-                else:
-                    archivos_corruptos += 1
+            def rutas_encontradas():
+                nonlocal archivos_encontrados
+                for ruta in backend_cleanser.escanear_carpetas(rutas_cola, metricas_callback=metricas.append):
+                    archivos_encontrados += 1
+                    self.root.after(0, lambda r=ruta: self._agregar_a_cola(r))
+                    yield ruta
+            
+            def partes_leidas():
+                nonlocal filas_procesadas, archivos_exitosos, archivos_corruptos, archivos_procesados
+                # Los resultados llegan en el orden de la cola aunque se lean varios archivos a la vez
+                resultados = backend_cleanser.iterar_archivos_procesados(rutas_encontradas(), self.trabajadores_ingesta, metricas_callback=metricas.append)
+                try:
+                    while not self.cancelado:
+                        while self.pausado:
+                            time.sleep(0.5)
+                            if self.cancelado: break
+                        if self.cancelado: break
+                        
+                        siguiente = next(resultados, None)
+                        if siguiente is None: break
+                        ruta_actual, df_temp, filas = siguiente
+                        
+                        if not df_temp.empty:
+                            filas_procesadas += filas
+                            archivos_exitosos += 1
+                            self.root.after(0, lambda f=filas_procesadas: self.lbl_filas_memoria.config(text=f"Filas cargadas: {f}"))
+                            yield df_temp
+                        else:
+                            archivos_corruptos += 1
+                        
+                        archivos_procesados += 1
+                        # El total crece mientras el escaneo sigue encontrando archivos
+                        porcentaje = int((archivos_procesados / archivos_encontrados) * 98) if archivos_encontrados > 0 else 98
+                        nombre_arch = os.path.basename(ruta_actual)
+                        self.root.after(0, lambda p=porcentaje: self.var_progreso.set(p))
+                        self.root.after(0, lambda p=porcentaje: self.lbl_porcentaje.config(text=f"{p}%"))
+                        self.root.after(0, lambda n=nombre_arch, a=archivos_procesados, e=archivos_encontrados: self.lbl_archivo_actual.config(text=f"Leído: {n} ({a} de {e} encontrados)", fg="blue"))
+                        self.root.after(0, self._quitar_primero_y_refrescar)
+                finally:
+                    resultados.close()
+            
+            # Con el maestro ya en disco no se cruza al leer: eso necesita el maestro entero en memoria
+            if self.cruzar_al_leer and not isinstance(self.df_maestro, backend_cleanser.MaestroEnDisco):
+                # Cada archivo se cruza apenas se lee; al final solo se reconcilian los clientes repetidos
+                def actualizar_reconciliacion(porcentaje, mensaje):
+                    self.root.after(0, lambda m=mensaje: self.lbl_archivo_actual.config(text=m, fg="blue"))
                 
-                archivos_procesados += 1
-                self.root.after(0, self._quitar_primero_y_refrescar)
+                df_maestro, df_final, estado_cruce = backend_cleanser.cruzar_en_streaming(partes_leidas(), self.df_maestro, self.estado_cruce, actualizar_reconciliacion, metricas_callback=metricas.append, persistir=self.persistir_cruce, unificar=self.unificar_cruce, trabajadores=self.trabajadores_ingesta)
+                if archivos_exitosos:
+                    self.df_maestro, self.df_final, self.estado_cruce = df_maestro, df_final, estado_cruce
+                    self.indices_clientes = backend_cleanser.construir_indices_clientes(self.df_final)
+                    cruzado = True
+            else:
+                # Si pasa el límite, lo leído y lo que sigue va a Parquet en disco en vez de quedar en RAM
+                maestro = backend_cleanser.acumular_maestro(partes_leidas(), self.limite_maestro_mb, previo=self.df_maestro, metricas_callback=metricas.append)
+            
+            if archivos_encontrados == 0 and not self.cancelado:
+                self.root.after(0, lambda: messagebox.showinfo("Filtro", "No se encontraron archivos válidos.", parent=self.vent_progreso))
+                self.cancelado = True
                 
-            if df_acumulado:
+            if archivos_exitosos:
                 self.root.after(0, lambda: self.var_progreso.set(99))
                 self.root.after(0, lambda: self.lbl_porcentaje.config(text="99%"))
                 
-                df_nuevo = pd.concat(df_acumulado, ignore_index=True)
-                if not self.df_maestro.empty:
-                    self.df_maestro = pd.concat([self.df_maestro, df_nuevo], ignore_index=True)
-                else:
-                    self.df_maestro = df_nuevo
+                # Une también las categorías de Vendedor/Zona_Cruda para que el maestro no vuelva a object
+                if not cruzado: self.df_maestro = maestro
                 
                 self.root.after(0, lambda: self.var_progreso.set(100))
                 self.root.after(0, lambda: self.lbl_porcentaje.config(text="100%"))
-                self.root.after(0, lambda: backend_cleanser.registrar_historial("Lote Procesado", f"{archivos_exitosos} archivos", filas_procesadas))
+                self.root.after(0, lambda: backend_cleanser.registrar_metricas(metricas, backend_cleanser.registrar_historial("Lote Procesado", f"{archivos_exitosos} archivos", filas_procesadas)))
                 
             self.root.after(0, finalizar_ui)
             
@@ -516,9 +610,15 @@ class DataCleanserApp:
         self.lbl_estado_cruce.pack(pady=5)
 
     def iniciar_cruce_fondo(self):
-        if self.df_maestro.empty:
+        if not backend_cleanser.filas_maestro(self.df_maestro):
             return messagebox.showwarning("Atención", "No hay datos en memoria para cruzar. Primero leé algún archivo.")
             
+        self.persistir_cruce = self.var_persistir.get()
+        self.unificar_cruce = self.var_unificar.get()
+        try:
+            self.trabajadores_cruce = max(1, int(self.var_trabajadores.get()))
+        except (tk.TclError, ValueError):
+            self.trabajadores_cruce = 1
         self.notebook.select(self.tab_datos)
         self.abrir_popup_cruce()
         threading.Thread(target=self._trabajador_cruce).start()
@@ -530,9 +630,13 @@ class DataCleanserApp:
             self.root.after(0, lambda m=mensaje: self.lbl_estado_cruce.config(text=m, fg="blue"))
 
         try:
-            self.df_final = backend_cleanser.procesar_cruce(self.df_maestro, actualizar_progreso_cruce)
+            metricas = []
+            self.df_final, self.estado_cruce = backend_cleanser.procesar_cruce_incremental(self.df_maestro, self.estado_cruce, actualizar_progreso_cruce, metricas_callback=metricas.append, persistir=self.persistir_cruce, unificar=self.unificar_cruce, trabajadores=self.trabajadores_cruce)
+            self.indices_clientes = backend_cleanser.construir_indices_clientes(self.df_final)
             
             def finalizar_exito():
+                backend_cleanser.registrar_metricas(metricas)
+                self.actualizar_tabla_historial()
                 if hasattr(self, 'vent_cruce') and self.vent_cruce.winfo_exists():
                     self.vent_cruce.destroy()
                 self.actualizar_tabla_datos(cruza_finalizada=True)
@@ -549,35 +653,124 @@ class DataCleanserApp:
                 
             self.root.after(0, finalizar_error)
 
+    def abrir_base_guardada(self):
+        info = backend_cleanser.info_base_unificada()
+        if info is None:
+            return messagebox.showinfo("Base guardada", "Todavía no se guardó ninguna base. Marcá 'Guardar la base unificada en disco' antes de cruzar.")
+        self.df_final = backend_cleanser.consultar_base_unificada()
+        self.indices_clientes = backend_cleanser.construir_indices_clientes(self.df_final)
+        self.notebook.select(self.tab_datos)
+        self.actualizar_tabla_datos(cruza_finalizada=True)
+        self.lbl_estado_principal.config(text=f"Base guardada el {info[0]}: {len(self.df_final)} registros únicos (sin releer archivos).", fg="green")
+
     def actualizar_tabla_datos(self, cruza_finalizada=False):
-        for i in self.tree.get_children(): self.tree.delete(i)
-        
-        LIMITE = 500 
-        count = 0
+        self.grilla_cruzada = cruza_finalizada
+        self.grilla_inicio = 0
+        self._aplicar_busqueda()
         
         if cruza_finalizada:
             self.tree.heading("Zona", text="Zona Enriquecida")
             self.tree.heading("InfoExtra", text="Teléfonos Extraídos")
-            for _, row in self.df_final.iterrows():
-                if count >= LIMITE: break
-                tels_str = " | ".join([t for t in [row['Primer número'], row['Segundo número'], row['Tercer número']] if t])
-                self.tree.insert("", "end", values=(row['Nombre'], row['Número de cliente'], row['Zona del cliente'], row['Vendedor'], tels_str))
-                count += 1
-                
-            texto_extra = f" (Mostrando primeros {LIMITE})" if len(self.df_final) > LIMITE else ""
-            self.lbl_estado_principal.config(text=f"Base unificada y lista: {len(self.df_final)} registros únicos.{texto_extra}", fg="green")
+            memoria = backend_cleanser.memoria_dataframe_mb(self.df_maestro) + backend_cleanser.memoria_dataframe_mb(self.df_final)
+            self.lbl_estado_principal.config(text=f"Base unificada y lista: {len(self.df_final)} registros únicos. Memoria: {memoria:.1f} MB", fg="green")
         else:
             self.tree.heading("Zona", text="Zona Cruda (Memoria)")
             self.tree.heading("InfoExtra", text="Bolsa de Texto Crudo")
-            for _, row in self.df_maestro.iterrows(): 
-                if count >= LIMITE: break
-                texto_bolsa = str(row.get('Row_String',''))[:80] + "..." if len(str(row.get('Row_String',''))) > 80 else str(row.get('Row_String',''))
-                
-                self.tree.insert("", "end", values=(row.get('Nombre',''), row.get('Numero_Cliente',''), row.get('Zona_Cruda',''), row.get('Vendedor',''), texto_bolsa))
-                count += 1
-                
-            texto_extra = f" (Mostrando primeros {LIMITE})" if len(self.df_maestro) > LIMITE else ""
-            self.lbl_estado_principal.config(text=f"Registros en memoria: {len(self.df_maestro)}.{texto_extra} Falta cruzar.", fg="orange")
+            if isinstance(self.df_maestro, backend_cleanser.MaestroEnDisco):
+                self.lbl_estado_principal.config(text=f"Registros en disco: {self.df_maestro.filas} ({self.df_maestro.carpeta}). Falta cruzar.", fg="orange")
+            else:
+                memoria = backend_cleanser.memoria_dataframe_mb(self.df_maestro)
+                self.lbl_estado_principal.config(text=f"Registros en memoria: {len(self.df_maestro)}. Memoria: {memoria:.1f} MB. Falta cruzar.", fg="orange")
+        self._pintar_grilla()
+
+    # ==========================================
+    # GRILLA VIRTUAL (solo se materializan las filas visibles)
+    # ==========================================
+    def _df_grilla(self):
+        if self.grilla_cruzada: return self.df_final
+        # El maestro en disco no se muestra: leerlo entero para la grilla es justo lo que se evita
+        return pd.DataFrame() if isinstance(self.df_maestro, backend_cleanser.MaestroEnDisco) else self.df_maestro
+
+    def _filas_visibles(self):
+        alto_fila = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        alto = self.tree.winfo_height()
+        return max(1, (alto - 25) // alto_fila) if alto > 1 else 25 # Antes de dibujarse winfo_height vale 1
+
+    def _total_grilla(self):
+        return len(self.grilla_posiciones) if self.grilla_posiciones is not None else len(self._df_grilla())
+
+    def _posicion_en_df(self, item_id):
+        # item_id es el lugar de la fila dentro de la ventana visible
+        lugar = self.grilla_inicio + self.tree.index(item_id)
+        return int(self.grilla_posiciones[lugar]) if self.grilla_posiciones is not None else lugar
+
+    def _valores_ventana(self, inicio, fin):
+        df = self._df_grilla()
+        ventana = df.iloc[self.grilla_posiciones[inicio:fin]] if self.grilla_posiciones is not None else df.iloc[inicio:fin]
+        if self.grilla_cruzada:
+            datos = ventana[['Nombre', 'Número de cliente', 'Zona del cliente', 'Vendedor', 'Primer número', 'Segundo número', 'Tercer número']].to_numpy(dtype=object)
+            return [(n, nro, z, v, " | ".join([t for t in tels if t])) for n, nro, z, v, *tels in datos]
+        
+        columnas = [ventana[col].to_numpy(dtype=object) if col in ventana.columns else [''] * len(ventana)
+                    for col in ['Nombre', 'Numero_Cliente', 'Zona_Cruda', 'Vendedor', 'Row_String']]
+        filas = []
+        for n, nro, z, v, texto in zip(*columnas):
+            texto = str(texto)
+            filas.append((n, nro, z, v, texto[:80] + "..." if len(texto) > 80 else texto))
+        return filas
+
+    def _pintar_grilla(self):
+        total = self._total_grilla()
+        visibles = self._filas_visibles()
+        self.grilla_inicio = max(0, min(self.grilla_inicio, total - visibles))
+        if self.grilla_inicio != self.grilla_pintada_desde:
+            # La selección quedaría sobre otro cliente al reescribir las filas
+            self.tree.selection_remove(self.tree.selection())
+            self.grilla_pintada_desde = self.grilla_inicio
+        fin = min(total, self.grilla_inicio + visibles)
+        valores = self._valores_ventana(self.grilla_inicio, fin)
+        
+        # Se reutilizan los mismos ítems (iid = posición dentro de la ventana) en vez de borrar e insertar
+        existentes = self.tree.get_children()
+        for i, fila in enumerate(valores):
+            if i < len(existentes): self.tree.item(existentes[i], values=fila)
+            else: self.tree.insert("", "end", iid=str(i), values=fila)
+        if len(existentes) > len(valores): self.tree.delete(*existentes[len(valores):])
+        
+        if total: self.scroll_grilla.set(self.grilla_inicio / total, fin / total)
+        else: self.scroll_grilla.set(0, 1)
+
+    def _programar_busqueda(self):
+        # Espera a que se deje de tipear un momento antes de filtrar
+        if self.busqueda_pendiente is not None: self.root.after_cancel(self.busqueda_pendiente)
+        self.busqueda_pendiente = self.root.after(150, self._buscar)
+
+    def _buscar(self):
+        self.busqueda_pendiente = None
+        self.grilla_inicio = 0
+        self._aplicar_busqueda()
+        self._pintar_grilla()
+
+    def _aplicar_busqueda(self):
+        if not self.grilla_cruzada or self.indices_clientes is None:
+            self.grilla_posiciones = None
+            self.lbl_busqueda.config(text="" if not self.var_busqueda.get().strip() else "(la búsqueda funciona sobre la base ya cruzada)")
+            return
+        self.grilla_posiciones = backend_cleanser.buscar_clientes(self.indices_clientes, self.var_busqueda.get())
+        self.lbl_busqueda.config(text="" if self.grilla_posiciones is None else f"{len(self.grilla_posiciones)} coincidencias")
+
+    def _mover_grilla(self, filas):
+        self.grilla_inicio += filas
+        self._pintar_grilla()
+        return "break"
+
+    def _desplazar_grilla(self, accion, cantidad, unidad=None):
+        if accion == "moveto":
+            self.grilla_inicio = int(float(cantidad) * self._total_grilla())
+        elif accion == "scroll":
+            paso = self._filas_visibles() if unidad == "pages" else 1
+            self.grilla_inicio += int(cantidad) * paso
+        self._pintar_grilla()
 
     def exportar_excel(self):
         if self.df_final.empty:
@@ -585,18 +778,108 @@ class DataCleanserApp:
             
         ruta_guardar = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
-            filetypes=[("Excel", "*.xlsx")],
+            filetypes=[("Excel", "*.xlsx"), ("CSV (UTF-8)", "*.csv"), ("Parquet", "*.parquet")],
             title="Guardar Base de Datos Optimizada",
             initialfile=f"Base_WoodTools_Optimizada_{datetime.now().strftime('%Y%m%d')}.xlsx"
         )
         
         if ruta_guardar:
-            try:
-                backend_cleanser.guardar_excel(self.df_final, ruta_guardar)
-                messagebox.showinfo("Éxito", f"Base de datos exportada perfectamente.\n\nYa está lista para subirla a tu CRM de WhatsApp.")
-                os.startfile(os.path.dirname(ruta_guardar))
-            except Exception as e:
-                messagebox.showerror("Error al guardar", str(e))
+            self.abrir_popup_exportacion()
+            # Se exporta una foto de la base: si el usuario edita mientras tanto, no se mezcla a mitad de archivo
+            threading.Thread(target=self._trabajador_exportacion, args=(self.df_final.copy(), ruta_guardar), daemon=True).start()
+
+    def abrir_popup_exportacion(self):
+        self.vent_exportacion = tk.Toplevel(self.root)
+        self.vent_exportacion.title("Exportando Base...")
+        self.vent_exportacion.geometry("450x180")
+        self.vent_exportacion.resizable(False, False)
+        self.vent_exportacion.transient(self.root)
+        self.vent_exportacion.grab_set()
+
+        self.lbl_porcentaje_exportacion = tk.Label(self.vent_exportacion, text="0%", font=("Segoe UI", 22, "bold"), fg="#E91E63")
+        self.lbl_porcentaje_exportacion.pack(pady=10)
+
+        self.var_progreso_exportacion = tk.DoubleVar()
+        ttk.Progressbar(self.vent_exportacion, variable=self.var_progreso_exportacion, maximum=100, length=380).pack(pady=5)
+
+        self.lbl_estado_exportacion = tk.Label(self.vent_exportacion, text="Preparando archivo...", font=("Arial", 9), fg="gray")
+        self.lbl_estado_exportacion.pack(pady=5)
+
+    def _trabajador_exportacion(self, df_exportar, ruta_guardar):
+        def actualizar_progreso_exportacion(porcentaje, mensaje):
+            self.root.after(0, lambda p=porcentaje: self.var_progreso_exportacion.set(p))
+            self.root.after(0, lambda p=porcentaje: self.lbl_porcentaje_exportacion.config(text=f"{p}%"))
+            self.root.after(0, lambda m=mensaje: self.lbl_estado_exportacion.config(text=m, fg="blue"))
+
+        def cerrar_popup():
+            if hasattr(self, 'vent_exportacion') and self.vent_exportacion.winfo_exists():
+                self.vent_exportacion.destroy()
+
+        try:
+            metrica = backend_cleanser.exportar_base(df_exportar, ruta_guardar, progress_callback=actualizar_progreso_exportacion)
+
+            def finalizar_exito():
+                backend_cleanser.registrar_metricas([metrica])
+                self.actualizar_tabla_historial()
+                cerrar_popup()
+                messagebox.showinfo("Éxito", f"Base de datos exportada perfectamente ({metrica.filas} filas en {metrica.segundos:.1f} s).\n\nYa está lista para subirla a tu CRM de WhatsApp.")
+                self._abrir_carpeta(os.path.dirname(ruta_guardar))
+
+            self.root.after(0, finalizar_exito)
+
+        except Exception as e:
+            def finalizar_error(err=str(e)):
+                cerrar_popup()
+                messagebox.showerror("Error al guardar", err)
+
+            self.root.after(0, finalizar_error)
+
+    def _abrir_carpeta(self, carpeta):
+        # Corre en un callback de Tk, fuera del try del trabajador: sin esto el error no se ve
+        try:
+            os.startfile(carpeta) # Solo existe en Windows
+        except (OSError, AttributeError) as e:
+            messagebox.showerror("Error al guardar", str(e))
+
+    def exportar_por_vendedor(self):
+        if self.df_final.empty:
+            return messagebox.showerror("Error", "Primero debes esperar a que termine el 'Cruce de Datos' para generar la base limpia.")
+
+        carpeta = filedialog.askdirectory(title="Carpeta donde dejar un Excel por vendedor")
+        if carpeta:
+            carpeta = os.path.join(carpeta, f"Vendedores_WoodTools_{datetime.now().strftime('%Y%m%d')}")
+            self.abrir_popup_exportacion()
+            threading.Thread(target=self._trabajador_exportacion_vendedores, args=(self.df_final.copy(), carpeta, self.var_trabajadores.get()), daemon=True).start()
+
+    def _trabajador_exportacion_vendedores(self, df_exportar, carpeta, trabajadores):
+        def actualizar_progreso_exportacion(porcentaje, mensaje):
+            self.root.after(0, lambda p=porcentaje: self.var_progreso_exportacion.set(p))
+            self.root.after(0, lambda p=porcentaje: self.lbl_porcentaje_exportacion.config(text=f"{p}%"))
+            self.root.after(0, lambda m=mensaje: self.lbl_estado_exportacion.config(text=m, fg="blue"))
+
+        def cerrar_popup():
+            if hasattr(self, 'vent_exportacion') and self.vent_exportacion.winfo_exists():
+                self.vent_exportacion.destroy()
+
+        try:
+            metricas = []
+            manifiesto = backend_cleanser.exportar_por_vendedor(df_exportar, carpeta, 'xlsx', trabajadores, actualizar_progreso_exportacion, metricas.append)
+
+            def finalizar_exito():
+                backend_cleanser.registrar_metricas(metricas)
+                self.actualizar_tabla_historial()
+                cerrar_popup()
+                messagebox.showinfo("Éxito", f"Se generaron {len(manifiesto['archivos'])} archivos (uno por vendedor) en {manifiesto['segundos_total']:.1f} s.\n\nEl detalle de cada archivo quedó en {backend_cleanser.ARCHIVO_MANIFIESTO}.")
+                self._abrir_carpeta(carpeta)
+
+            self.root.after(0, finalizar_exito)
+
+        except Exception as e:
+            def finalizar_error(err=str(e)):
+                cerrar_popup()
+                messagebox.showerror("Error al guardar", err)
+
+            self.root.after(0, finalizar_error)
 
     def actualizar_tabla_historial(self):
         for i in self.tree_hist.get_children(): self.tree_hist.delete(i)
@@ -605,8 +888,23 @@ class DataCleanserApp:
             for _, row in df_hist.iterrows():
                 self.tree_hist.insert("", "end", values=(row['id'], row['fecha'], row['tipo_carga'], row['ruta'], row['registros_encontrados']))
         except: pass
+        
+        for i in self.tree_metricas.get_children(): self.tree_metricas.delete(i)
+        try:
+            df_met = backend_cleanser.obtener_metricas()
+            por_archivo = df_met[df_met['etapa'] == "archivo"]
+            lentos = set(por_archivo.nlargest(5, 'segundos').index)
+            formato = lambda valor, patron: "" if pd.isna(valor) else patron.format(valor)
+            for idx, row in df_met.iterrows():
+                self.tree_metricas.insert("", "end", tags=("lento",) if idx in lentos else (), values=(
+                    row['fecha'], row['etapa'], os.path.basename(row['archivo']) if row['archivo'] else "",
+                    formato(row['segundos'], "{:.2f}"), formato(row['filas_por_segundo'], "{:,.0f}"),
+                    formato(row['archivos_por_segundo'], "{:.2f}"), formato(row['pico_rss_mb'], "{:.0f}")))
+        except: pass
 
 if __name__ == "__main__":
+    # Necesario para que el pool de procesos funcione adentro del .exe de PyInstaller
+    multiprocessing.freeze_support()
     try:
         import ctypes
         myappid = 'woodtools.compresor.datos.1.0'